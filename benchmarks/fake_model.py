@@ -0,0 +1,151 @@
+"""Deterministic scripted stand-in for Gemini.
+
+Each ``ScriptedModel`` plays one agent role and decides its next turn purely
+from the rendered instruction and the function responses already in the
+request, so a full court run is reproducible and needs no API key. An
+optional fixed delay per call stands in for model latency. The size of
+every request (instruction + contents, in characters) is recorded per role
+in ``PROMPT_CHARS``.
+"""
+import asyncio
+import json
+import re
+from collections import Counter, defaultdict
+from typing import Any, AsyncGenerator
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+
+from workflow_agents.ranking import TAG_KEYWORDS, tokenize
+
+
+CALLS: Counter = Counter()
+PROMPT_CHARS: defaultdict[str, list[int]] = defaultdict(list)
+
+_CANDIDATE_RE = re.compile(r"^\[(\d+)\] (.+)\n(.*)$", re.M)
+
+
+def _field(instruction: str, name: str) -> str:
+    m = re.search(rf"^{re.escape(name)}:\s*(.*)$", instruction, re.M)
+    return m.group(1).strip() if m else ""
+
+
+def _first_sentence(text: str) -> str:
+    sentence = re.split(r"(?<=[.!?])\s+", " ".join(text.split()), maxsplit=1)[0]
+    return sentence.rstrip(".")
+
+
+def prompt_chars(llm_request: LlmRequest) -> int:
+    """Characters sent to the model: system instruction + serialized contents."""
+    instruction = str(llm_request.config.system_instruction or "") if llm_request.config else ""
+    contents = [c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents or []]
+    return len(instruction) + len(json.dumps(contents, ensure_ascii=False))
+
+
+def _last_function_responses(llm_request: LlmRequest) -> dict[str, Any]:
+    """Function responses in the newest content, keyed by tool name."""
+    if not llm_request.contents:
+        return {}
+    responses = {}
+    for part in llm_request.contents[-1].parts or []:
+        if part.function_response:
+            responses[part.function_response.name] = part.function_response.response or {}
+    return responses
+
+
+def _last_user_text(llm_request: LlmRequest) -> str:
+    for content in reversed(llm_request.contents or []):
+        if content.role == "user":
+            texts = [p.text for p in content.parts or [] if p.text]
+            if texts:
+                return texts[-1].strip()
+    return ""
+
+
+def _calls(*calls: tuple[str, dict[str, Any]]) -> types.Content:
+    return types.Content(role="model", parts=[types.Part.from_function_call(name=n, args=a) for n, a in calls])
+
+
+def _text(text: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+class ScriptedModel(BaseLlm):
+    """Scripted model for one role: root / admirer / critic / translator."""
+
+    model: str = "scripted"
+    role: str
+    latency_s: float = 0.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        CALLS[self.role] += 1
+        PROMPT_CHARS[self.role].append(prompt_chars(llm_request))
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+
+        instruction = str(llm_request.config.system_instruction or "") if llm_request.config else ""
+        responses = _last_function_responses(llm_request)
+        content = getattr(self, f"_{self.role}")(instruction, responses, llm_request)
+        yield LlmResponse(content=content)
+
+    # --- roles ---
+    def _root(self, instruction: str, responses: dict[str, Any], llm_request: LlmRequest) -> types.Content:
+        if "init_topic" in responses:
+            return _calls(("transfer_to_agent", {"agent_name": "court_system"}))
+        if "transfer_to_agent" in responses:
+            return _text("Court session finished.")
+        return _calls(("init_topic", {"topic": _last_user_text(llm_request)}))
+
+    def _candidates(self, instruction: str, responses: dict[str, Any]) -> list[dict[str, str]]:
+        pages = [{"title": t.strip(), "content": c} for _, t, c in _CANDIDATE_RE.findall(instruction)]
+        searched = responses.get("wiki_search_many", {}).get("results", [])
+        return pages + [{"title": r["title"], "content": r["content"]} for r in searched]
+
+    def _admirer(self, instruction: str, responses: dict[str, Any], llm_request: LlmRequest) -> types.Content:
+        if "append_fact" in responses:
+            return _text("Positive facts recorded.")
+
+        needed = int(_field(instruction, "NEEDED") or 3)
+        used = _field(instruction, "TITLES_USED")
+        pages = [p for p in self._candidates(instruction, responses) if p["title"] not in used]
+        if len(pages) < needed and "wiki_search_many" not in responses:
+            topic = _field(instruction, "TOPIC")
+            queries = [topic, f"{topic} achievements", f"{topic} legacy"]
+            return _calls(("wiki_search_many", {"queries": queries, "tag": "POS"}))
+
+        calls = []
+        for page in pages[:needed]:
+            fact = f"FACT: {_first_sentence(page['content'])} (Wikipedia: {page['title']})"
+            calls.append(("append_title_used", {"side": "pos", "title": page["title"]}))
+            calls.append(("append_fact", {"side": "pos", "fact": fact}))
+        return _calls(*calls) if calls else _text("No usable positive pages.")
+
+    def _critic(self, instruction: str, responses: dict[str, Any], llm_request: LlmRequest) -> types.Content:
+        if "append_fact" in responses:
+            return _text("Negative facts recorded.")
+
+        missing = re.findall(r"FACT\[(LEGAL|JAN6|OTHER)\]", _field(instruction, "MISSING_TAGS")) or ["LEGAL", "JAN6", "OTHER"]
+        used = _field(instruction, "TITLES_USED")
+        pages = [p for p in self._candidates(instruction, responses) if p["title"] not in used]
+        if len(pages) < len(missing) and "wiki_search_many" not in responses:
+            topic = _field(instruction, "TOPIC")
+            queries = [f"{topic} controversy", f"{topic} impeachment", f"{topic} January 6 United States Capitol attack"]
+            return _calls(("wiki_search_many", {"queries": queries, "tag": "NEG"}))
+
+        calls = []
+        for tag in missing:
+            keywords = set(TAG_KEYWORDS[tag])
+            best = max(pages, key=lambda p: sum(1 for t in tokenize(p["content"]) if t in keywords), default=None)
+            if best is None:
+                break
+            pages.remove(best)
+            fact = f"FACT[{tag}]: {_first_sentence(best['content'])} (Wikipedia: {best['title']})"
+            calls.append(("append_title_used", {"side": "neg", "title": best["title"]}))
+            calls.append(("append_fact", {"side": "neg", "fact": fact}))
+        return _calls(*calls) if calls else _text("No usable negative pages.")
+
+    def _translator(self, instruction: str, responses: dict[str, Any], llm_request: LlmRequest) -> types.Content:
+        lines = re.findall(r"^(\d+)\. (.+)$", instruction.split("LINES:", 1)[-1], re.M)
+        return _text("\n".join(f"{n}. [TH] {line}" for n, line in lines))
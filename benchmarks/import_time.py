@@ -0,0 +1,100 @@
+"""Import-time budget for the agent modules.
+
+Every sample imports the module in a fresh interpreter (nothing cached in
+``sys.modules``) and splits the time into third-party imports (ADK, genai,
+dotenv, ...) and the module's own body (our helpers, agent construction).
+The median over ``--repeat`` samples is checked against the budgets.
+``google.adk.agents.llm_agent`` alone accounts for most of the total, so
+``--budget-own`` is the number our code actually controls.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --module parent_and_subagents.agent --budget-total 2
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ต้อง import ชุดนี้ก่อนเพื่อแยกเวลาของ dependency ออกจากเวลาของโค้ดเราเอง
+DEPENDENCIES = [
+    "dotenv",
+    "google.genai.types",
+    "google.adk",
+    "google.adk.agents.llm_agent",
+    "google.adk.agents.loop_agent",
+    "google.adk.agents.parallel_agent",
+    "google.adk.agents.sequential_agent",
+    "google.adk.agents.invocation_context",
+    "google.adk.events",
+    "google.adk.models.google_llm",
+    "google.adk.tools.tool_context",
+]
+
+_PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for name in {deps!r}:
+    importlib.import_module(name)
+deps_done = time.perf_counter()
+importlib.import_module({module!r})
+end = time.perf_counter()
+print(json.dumps({{
+    "total_s": end - start,
+    "deps_s": deps_done - start,
+    "own_s": end - deps_done,
+    "requests_loaded": "requests" in sys.modules,
+}}))
+"""
+
+
+def sample(module: str) -> dict[str, Any]:
+    code = _PROBE.format(deps=DEPENDENCIES, module=module)
+    env = {**os.environ, "LOG_SINK": os.getenv("LOG_SINK", "file"), "LOG_FILE": os.devnull}
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(module: str, repeat: int) -> dict[str, Any]:
+    samples = [sample(module) for _ in range(max(1, repeat))]
+    return {
+        "module": module,
+        "repeat": len(samples),
+        "total_s": round(statistics.median(s["total_s"] for s in samples), 4),
+        "deps_s": round(statistics.median(s["deps_s"] for s in samples), 4),
+        "own_s": round(statistics.median(s["own_s"] for s in samples), 4),
+        "requests_loaded": samples[-1]["requests_loaded"],
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time")
+    parser.add_argument("--module", default="workflow_agents.agent")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-total", type=float, default=2.0, help="seconds, median cold import incl. ADK")
+    parser.add_argument("--budget-own", type=float, default=0.1, help="seconds, median of the module body alone")
+    args = parser.parse_args(argv)
+
+    result = measure(args.module, args.repeat)
+    print(json.dumps(result, indent=2))
+
+    failures = []
+    if result["total_s"] > args.budget_total:
+        failures.append(f"total {result['total_s']}s > {args.budget_total}s")
+    if result["own_s"] > args.budget_own:
+        failures.append(f"own {result['own_s']}s > {args.budget_own}s")
+    if failures:
+        print("OVER BUDGET: " + "; ".join(failures))
+        sys.exit(1)
+    print("within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Offline end-to-end benchmark of the Historical Court pipeline.
+
+Runs root_agent -> court_system (trial_loop -> verdict_writer) against the
+stub Wikipedia server and scripted models, then writes a JSON report with
+per-stage latency, model calls, prompt sizes, tool calls, loop iterations
+and bytes fetched. Pass --baseline to compare against an earlier report.
+
+    python -m benchmarks.run_court --out benchmarks/results/latest.json
+    python -m benchmarks.run_court --baseline benchmarks/results/baseline.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import aclosing
+from typing import Any, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURE = os.path.join(HERE, "fixtures", "pages.json")
+DEFAULT_OUT = os.path.join(HERE, "results", "latest.json")
+
+# เทียบ baseline: ค่าที่ deterministic ต้องไม่เพิ่ม, ค่าที่แกว่งได้ (เวลา / network ที่ขนานกัน) เพิ่มได้ไม่เกิน tolerance
+COUNT_METRICS = ["model_calls.total", "tool_calls.total", "loop_iterations"]
+TIME_METRICS = ["wall_time_s", "wiki.requests", "wiki.bytes"]
+
+
+def _prepare_env(workdir: str) -> None:
+    # ต้องตั้งก่อน import workflow_agents.agent
+    os.environ["WIKI_BACKEND"] = "online"
+    os.environ["CACHE_DIR"] = os.path.join(workdir, ".cache")
+    os.environ.setdefault("MODEL", "scripted")
+    os.chdir(workdir)
+
+
+def _instrument_agents(spans: dict[str, list[float]]) -> None:
+    """Record wall time of every agent run (by agent name)."""
+    from google.adk.agents import BaseAgent
+
+    original = BaseAgent.run_async
+
+    async def timed_run_async(self, parent_context):
+        start = time.perf_counter()
+        try:
+            async with aclosing(original(self, parent_context)) as agen:
+                async for event in agen:
+                    yield event
+        finally:
+            spans[self.name].append(time.perf_counter() - start)
+
+    BaseAgent.run_async = timed_run_async
+
+
+async def _run_once(runner, topic: str, session_id: str) -> dict[str, Any]:
+    from google.genai import types
+
+    await runner.session_service.create_session(app_name=runner.app_name, user_id="bench", session_id=session_id)
+    tool_calls: Counter = Counter()
+    message = types.Content(role="user", parts=[types.Part(text=topic)])
+    async for event in runner.run_async(user_id="bench", session_id=session_id, new_message=message):
+        for call in event.get_function_calls():
+            tool_calls[call.name] += 1
+
+    session = await runner.session_service.get_session(app_name=runner.app_name, user_id="bench", session_id=session_id)
+    return {"tool_calls": tool_calls, "state": dict(session.state) if session else {}}
+
+
+def run_benchmark(topic: str, fixture: str, runs: int, model_latency_s: float, wiki_latency_s: float) -> dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="court_bench_")
+    _prepare_env(workdir)
+
+    from google.adk.runners import InMemoryRunner
+
+    from benchmarks import fake_model
+    from callback_logging import METRICS
+    from ratelimit import limiter_stats
+    from benchmarks.stub_wiki import StubWiki
+    from workflow_agents import agent as court
+    from workflow_agents.evidence import evidence_counts
+
+    roles = [
+        (court.root_agent, "root"),
+        (court.admirer, "admirer"),
+        (court.critic_side, "critic"),
+        (court.fact_translator, "translator"),
+    ]
+    for llm_agent, role in roles:
+        llm_agent.model = fake_model.ScriptedModel(role=role, latency_s=model_latency_s)
+
+    spans: dict[str, list[float]] = defaultdict(list)
+    _instrument_agents(spans)
+    runner = InMemoryRunner(agent=court.root_agent, app_name="court_bench")
+
+    results = []
+    with StubWiki(fixture, latency_s=wiki_latency_s) as stub:
+        court.wiki_backend.api_url = stub.api_url
+        for i in range(runs):
+            spans.clear()
+            stub.reset_counters()
+            fake_model.CALLS.clear()
+            fake_model.PROMPT_CHARS.clear()
+            METRICS.reset()
+
+            start = time.perf_counter()
+            outcome = asyncio.run(_run_once(runner, topic, f"bench-{i}"))
+            wall = time.perf_counter() - start
+
+            state = outcome["state"]
+            tool_calls = outcome["tool_calls"]
+            results.append({
+                "run": i,
+                "cache": "cold" if i == 0 else "warm",
+                "wall_time_s": round(wall, 4),
+                "stages": {
+                    name: {"runs": len(v), "total_s": round(sum(v), 4), "max_s": round(max(v), 4)}
+                    for name, v in sorted(spans.items())
+                },
+                "model_calls": {**dict(fake_model.CALLS), "total": sum(fake_model.CALLS.values())},
+                "prompt_chars": {
+                    role: {"calls": len(sizes), "max": max(sizes), "total": sum(sizes)}
+                    for role, sizes in sorted(fake_model.PROMPT_CHARS.items())
+                },
+                "tool_calls": {**dict(tool_calls), "total": sum(tool_calls.values())},
+                "loop_iterations": len(spans.get("judge", [])),
+                "wiki": {"requests": stub.requests, "bytes": stub.bytes_sent},
+                **evidence_counts(state),
+                "output_written": bool(state.get("output_path")),
+                "translation_cache": court.translation_cache.stats(),
+                "limiter": limiter_stats(),
+                "metrics": METRICS.snapshot(),
+            })
+
+    return {
+        "topic": topic,
+        "fixture": os.path.basename(fixture),
+        "model_latency_s": model_latency_s,
+        "wiki_latency_s": wiki_latency_s,
+        "runs": results,
+    }
+
+
+def _metric(run: dict[str, Any], path: str) -> Optional[float]:
+    value: Any = run
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return float(value)
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Human-readable diff lines; lines starting with 'REGRESSION' fail the check."""
+    lines = []
+    for run, base in zip(report["runs"], baseline.get("runs", [])):
+        for path in COUNT_METRICS + TIME_METRICS:
+            new, old = _metric(run, path), _metric(base, path)
+            if new is None or old is None:
+                continue
+            limit = old * (1 + tolerance) if path in TIME_METRICS else old
+            status = "REGRESSION" if new > limit else "ok"
+            lines.append(f"{status:<10} run {run['run']} ({run['cache']}) {path}: {old:g} -> {new:g}")
+    return lines
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run_court")
+    parser.add_argument("--topic", default=None, help="topic (default: the fixture's topic)")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--runs", type=int, default=2, help="run 0 is cold cache, later runs are warm")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="seconds per scripted model call")
+    parser.add_argument("--wiki-latency", type=float, default=0.02, help="seconds per stub Wikipedia request")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative increase of time/network metrics")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    out = os.path.abspath(args.out)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    fixture = os.path.abspath(args.fixture)
+    with open(fixture, encoding="utf-8") as f:
+        topic = args.topic or json.load(f)["topic"]
+
+    report = run_benchmark(topic, fixture, args.runs, args.model_latency, args.wiki_latency)
+
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    for run in report["runs"]:
+        print(
+            f"run {run['run']} ({run['cache']}): {run['wall_time_s']}s, "
+            f"model_calls={run['model_calls']['total']}, tool_calls={run['tool_calls']['total']}, "
+            f"loops={run['loop_iterations']}, wiki={run['wiki']['requests']} req / {run['wiki']['bytes']} B"
+        )
+    print(f"report -> {out}")
+
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            lines = compare(report, json.load(f), args.tolerance)
+        print("\n".join(lines))
+        if args.fail_on_regression and any(ln.startswith("REGRESSION") for ln in lines):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
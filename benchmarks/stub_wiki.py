@@ -0,0 +1,119 @@
+"""Local stand-in for the MediaWiki API used by OnlineWikiBackend.
+
+Serves the two query shapes the backend sends (``list=search`` and the
+single-page ``prop=extracts|revisions|info|pageprops`` lookup) from a JSON
+fixture, with an optional per-request delay, and counts requests and bytes
+so a benchmark can report network traffic without touching Wikipedia.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(text: str) -> set[str]:
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+class StubWiki:
+    """Threaded HTTP server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, fixture_path: str, latency_s: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        with open(fixture_path, encoding="utf-8") as f:
+            self.pages: list[dict[str, Any]] = json.load(f)["pages"]
+        self.by_title = {p["title"].casefold(): p for p in self.pages}
+        self.latency_s = latency_s
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def api_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/w/api.php"
+
+    def start(self) -> "StubWiki":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubWiki":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+
+    # --- MediaWiki subset ---
+    def search(self, query: str, limit: int) -> dict[str, Any]:
+        terms = _tokens(query)
+        scored = []
+        for i, page in enumerate(self.pages):
+            title_hits = len(terms & _tokens(page["title"]))
+            body_hits = len(terms & _tokens(page["extract"]))
+            score = 3 * title_hits + body_hits
+            if score:
+                scored.append((-score, i, page["title"]))
+        scored.sort()
+        return {"query": {"search": [{"ns": 0, "title": t} for _, _, t in scored[:limit]]}}
+
+    def page(self, title: str) -> dict[str, Any]:
+        page = self.by_title.get(title.casefold())
+        if page is None:
+            return {"query": {"pages": [{"ns": 0, "title": title, "missing": True}]}}
+        result = {
+            "pageid": page["pageid"],
+            "ns": 0,
+            "title": page["title"],
+            "extract": page["extract"],
+            "revisions": [{"revid": page["revid"], "parentid": page["revid"] - 1}],
+            "fullurl": f"https://en.wikipedia.org/wiki/{page['title'].replace(' ', '_')}",
+        }
+        if page.get("disambiguation"):
+            result["pageprops"] = {"disambiguation": ""}
+        return {"query": {"pages": [result]}}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                if stub.latency_s:
+                    time.sleep(stub.latency_s)
+                if params.get("list") == "search":
+                    body = stub.search(params.get("srsearch", ""), int(params.get("srlimit", 5)))
+                elif "titles" in params:
+                    body = stub.page(params["titles"])
+                else:
+                    body = {"error": {"code": "badparams", "info": "unsupported query"}}
+
+                payload = json.dumps(body).encode("utf-8")
+                with stub._lock:
+                    stub.requests += 1
+                    stub.bytes_sent += len(payload)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
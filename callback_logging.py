@@ -1,19 +1,235 @@
+import atexit
+import json
 import logging
+import os
+import threading
+import time
+from typing import Any, Optional
 
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmResponse, LlmRequest
 
 
+# ----------------------------
+# In-process metrics (histograms + counters)
+# ----------------------------
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus layout)."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # +1 = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Bucket upper bound that covers quantile q (max for the +Inf bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        cumulative, running = {}, 0
+        for bound, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += n
+            cumulative[str(bound)] = running
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": cumulative,
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of labelled histograms and counters."""
+
+    def __init__(self, prefix: str = "court"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._spans: dict[tuple, float] = {}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def start_span(self, key: tuple) -> None:
+        with self._lock:
+            self._spans[key] = time.perf_counter()
+
+    def end_span(self, key: tuple) -> Optional[float]:
+        with self._lock:
+            start = self._spans.pop(key, None)
+        return None if start is None else time.perf_counter() - start
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._spans.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            histograms = {k: h.snapshot() for k, h in self._histograms.items()}
+            counters = dict(self._counters)
+        out: dict[str, Any] = {"histograms": {}, "counters": {}}
+        for (name, labels), snap in sorted(histograms.items()):
+            out["histograms"].setdefault(name, []).append({"labels": dict(labels), **snap})
+        for (name, labels), value in sorted(counters.items()):
+            out["counters"].setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return out
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = []
+
+        def fmt(labels: dict[str, str], extra: Optional[dict[str, str]] = None) -> str:
+            items = {**labels, **(extra or {})}
+            if not items:
+                return ""
+            body = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in items.items())
+            return "{" + body + "}"
+
+        for name, series in snap["histograms"].items():
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for s in series:
+                for bound, n in s["buckets"].items():
+                    lines.append(f"{metric}_bucket{fmt(s['labels'], {'le': bound})} {n}")
+                lines.append(f"{metric}_sum{fmt(s['labels'])} {s['sum']}")
+                lines.append(f"{metric}_count{fmt(s['labels'])} {s['count']}")
+        for name, series in snap["counters"].items():
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} counter")
+            for s in series:
+                lines.append(f"{metric}{fmt(s['labels'])} {s['value']}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+def metrics_snapshot() -> dict[str, Any]:
+    return METRICS.snapshot()
+
+
+def export_metrics(json_path: Optional[str] = None, prom_path: Optional[str] = None) -> None:
+    """Write the current metrics as a JSON snapshot and/or Prometheus text file."""
+    for path, payload in (
+        (json_path, lambda: json.dumps(METRICS.snapshot(), indent=2)),
+        (prom_path, METRICS.to_prometheus),
+    ):
+        if not path:
+            continue
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload())
+        logging.info(f"[metrics] exported {path}")
+
+
+def record_retry(backend: str, reason: str = "") -> None:
+    METRICS.inc("retries_total", backend=backend, reason=reason or "unknown")
+
+
+# ส่งออกอัตโนมัติตอนจบ process ถ้าตั้ง METRICS_JSON_PATH / METRICS_PROM_PATH ไว้
+if os.getenv("METRICS_JSON_PATH") or os.getenv("METRICS_PROM_PATH"):
+    atexit.register(export_metrics, os.getenv("METRICS_JSON_PATH"), os.getenv("METRICS_PROM_PATH"))
+
+
+# ----------------------------
+# Model callbacks
+# ----------------------------
 def log_query_to_model(callback_context: CallbackContext, llm_request: LlmRequest):
+    METRICS.start_span(("model", callback_context.invocation_id, callback_context.agent_name))
+    METRICS.inc("model_calls_total", agent=callback_context.agent_name)
     if llm_request.contents and llm_request.contents[-1].role == 'user':
         for part in llm_request.contents[-1].parts:
             if part.text:
                 logging.info("[query to %s]: %s", callback_context.agent_name, part.text)
 
 def log_model_response(callback_context: CallbackContext, llm_response: LlmResponse):
+    agent = callback_context.agent_name
+    if not llm_response.partial:
+        elapsed = METRICS.end_span(("model", callback_context.invocation_id, agent))
+        if elapsed is not None:
+            METRICS.observe("model_latency_seconds", elapsed, agent=agent)
+
+    usage = llm_response.usage_metadata
+    if usage is not None:
+        for kind, value in (
+            ("prompt", usage.prompt_token_count),
+            ("output", usage.candidates_token_count),
+            ("cached", usage.cached_content_token_count),
+            ("total", usage.total_token_count),
+        ):
+            if value:
+                METRICS.inc("tokens_total", value, agent=agent, kind=kind)
+    if llm_response.error_code:
+        METRICS.inc("model_errors_total", agent=agent, code=str(llm_response.error_code))
+
     if llm_response.content and llm_response.content.parts:
         for part in llm_response.content.parts:
             if part.text:
-                logging.info("[response from %s]: %s", callback_context.agent_name, part.text)
+                logging.info("[response from %s]: %s", agent, part.text)
             elif part.function_call:
-                logging.info("[function call from %s]: %s", callback_context.agent_name, part.function_call.name)
+                logging.info("[function call from %s]: %s", agent, part.function_call.name)
+
+
+# ----------------------------
+# Agent / tool span callbacks
+# ----------------------------
+def start_agent_span(callback_context: CallbackContext):
+    METRICS.start_span(("agent", callback_context.invocation_id, callback_context.agent_name))
+
+def end_agent_span(callback_context: CallbackContext):
+    elapsed = METRICS.end_span(("agent", callback_context.invocation_id, callback_context.agent_name))
+    if elapsed is not None:
+        METRICS.observe("agent_duration_seconds", elapsed, agent=callback_context.agent_name)
+
+def start_tool_span(tool, args: dict[str, Any], tool_context):
+    METRICS.start_span(("tool", tool_context.function_call_id))
+
+def end_tool_span(tool, args: dict[str, Any], tool_context, tool_response: Any):
+    elapsed = METRICS.end_span(("tool", tool_context.function_call_id))
+    if elapsed is not None:
+        METRICS.observe("tool_latency_seconds", elapsed, tool=tool.name, agent=tool_context.agent_name)
+    METRICS.inc("tool_calls_total", tool=tool.name, agent=tool_context.agent_name)
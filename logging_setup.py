@@ -0,0 +1,183 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Optional
+
+
+# ----------------------------
+# Queue-based, batched log shipping
+# ----------------------------
+# LOG_SINK   = stdout | file | cloud  (ใส่หลายค่าได้ คั่นด้วย comma)
+#              ค่าเริ่มต้น stdout ยกเว้นมี console handler ของผู้เรียกอยู่แล้ว (adk web / adk run) -> ไม่มี sink
+# LOG_FILE   = path ของไฟล์ log เมื่อใช้ sink แบบ file
+# LOG_LEVEL  = INFO / DEBUG / ...  (ไม่ตั้ง = ไม่แตะ level ของ root ถ้าผู้เรียกตั้ง logging ไว้แล้ว)
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class _CloudSink:
+    """Ships batches to Cloud Logging; the client is created on first use, in the worker thread."""
+
+    def __init__(self, log_name: str):
+        self.log_name = log_name
+        self._logger = None
+        self._disabled = False
+
+    def write(self, records: list[logging.LogRecord], formatter: logging.Formatter) -> None:
+        if self._disabled:
+            return
+        try:
+            if self._logger is None:
+                import google.cloud.logging  # type: ignore
+
+                self._logger = google.cloud.logging.Client().logger(self.log_name)
+            batch = self._logger.batch()
+            for record in records:
+                batch.log_text(formatter.format(record), severity=record.levelname)
+            batch.commit()
+        except Exception as e:
+            # ปิด sink นี้ไปเลย ไม่ให้ network ทำให้ pipeline ช้าหรือพัง
+            self._disabled = True
+            print(f"Cloud Logging disabled (safe fallback): {e}", file=sys.stderr)
+
+
+class _BatchWorker:
+    """Background thread: drains the queue and writes records in batches."""
+
+    def __init__(self, log_queue: queue.Queue, sinks: list[str], log_file: str,
+                 batch_size: int = 200, flush_interval: float = 1.0):
+        self.queue = log_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.streams = []
+        self.cloud: Optional[_CloudSink] = None
+
+        if "stdout" in sinks:
+            self.streams.append(sys.stdout)
+        if "file" in sinks:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.streams.append(open(log_file, "a", encoding="utf-8"))
+        if "cloud" in sinks:
+            self.cloud = _CloudSink(log_name=os.getenv("LOG_NAME", "historical_court"))
+
+        self._stop = object()
+        self._thread = threading.Thread(target=self._run, name="log-shipper", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.queue.put(self._stop)
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            records, stopping = [], first is self._stop
+            if not stopping:
+                records.append(first)
+            while len(records) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._stop:
+                    stopping = True
+                    break
+                records.append(item)
+            if records:
+                self._flush(records)
+            if stopping:
+                return
+
+    def _flush(self, records: list[logging.LogRecord]) -> None:
+        text = "".join(self.formatter.format(r) + "\n" for r in records)
+        for stream in self.streams:
+            try:
+                stream.write(text)
+                stream.flush()
+            except Exception:
+                pass
+        if self.cloud is not None:
+            self.cloud.write(records, self.formatter)
+
+
+_worker: Optional[_BatchWorker] = None
+_lock = threading.Lock()
+
+
+def setup_logging(level: Optional[str] = None) -> None:
+    """Add a root handler that routes records through a queue to a batched background writer.
+
+    Handlers installed by the caller (adk web / adk run, pytest's caplog)
+    are left in place; only a handler from an earlier call is replaced. When
+    the caller already prints to the console, ``LOG_SINK`` defaults to no
+    sink instead of ``stdout``, and the root level is only changed when
+    ``level`` / ``LOG_LEVEL`` is given (INFO if nobody configured logging).
+
+    Idempotent and cheap: no network client is created here, so importing an
+    agent never blocks on Cloud Logging. Each logging call only enqueues.
+    """
+    global _worker
+    with _lock:
+        if _worker is not None:
+            return
+        root = logging.getLogger()
+        # เปลี่ยนเฉพาะ handler ที่ module นี้ติดตั้งเอง; handler ของ adk web / adk run / pytest ยังอยู่
+        for handler in list(root.handlers):
+            if isinstance(handler, _DroppingQueueHandler):
+                root.removeHandler(handler)
+        caller_console = any(_is_console(h) for h in root.handlers)
+
+        level = level or os.getenv("LOG_LEVEL")
+        if level:
+            root.setLevel(level.upper())
+        elif not root.handlers:
+            root.setLevel(logging.INFO)
+
+        default_sink = "" if caller_console else "stdout"
+        sinks = [s.strip().lower() for s in os.getenv("LOG_SINK", default_sink).split(",") if s.strip()]
+        if not sinks:
+            return
+        log_file = os.getenv("LOG_FILE", os.path.join("logs", "court.log"))
+        log_queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        root.addHandler(_DroppingQueueHandler(log_queue))
+
+        _worker = _BatchWorker(log_queue, sinks, log_file)
+        _worker.start()
+        atexit.register(shutdown_logging)
+
+
+def _is_console(handler: logging.Handler) -> bool:
+    return (isinstance(handler, logging.StreamHandler)
+            and getattr(handler, "stream", None) in (sys.stdout, sys.stderr, sys.__stdout__, sys.__stderr__))
+
+
+def shutdown_logging() -> None:
+    """Flush everything still queued (called automatically at exit)."""
+    global _worker
+    with _lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        worker.stop()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never block the caller: when the queue is full the record is dropped."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
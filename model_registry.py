@@ -0,0 +1,63 @@
+import asyncio
+import functools
+import os
+from contextlib import aclosing
+from typing import AsyncGenerator, Optional
+
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+from google.genai import types
+
+from callback_logging import record_retry
+from ratelimit import governor, status_of
+
+
+# ----------------------------
+# Shared Gemini instances (one per model name)
+# ----------------------------
+# Gemini สร้าง genai Client (และ HTTP connection pool) ตอนเรียกโมเดลครั้งแรกเท่านั้น
+# agent ทุกตัวที่ใช้ model เดียวกันจึงควรใช้ instance เดียวกัน ไม่ใช่สร้างใหม่ทีละ agent
+# retry ทำที่ GovernedGemini (ผ่าน limiter ร่วม) ไม่ใช่ใน HTTP client เพื่อไม่ให้ retry ซ้อนกันเป็น storm
+RETRY_OPTIONS = types.HttpRetryOptions(attempts=1)
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+class GovernedGemini(Gemini):
+    """Gemini whose calls go through the process-wide "gemini" governor.
+
+    Each attempt waits for a token and a concurrency slot; 429/503 responses
+    shrink the shared rate (AIMD) and are retried with jittered backoff, as
+    long as nothing has been streamed to the caller yet.
+    """
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        gov = governor("gemini")
+        for attempt in range(gov.attempts):
+            await gov.acquire_async()
+            yielded, error = False, None
+            try:
+                async with aclosing(super().generate_content_async(llm_request, stream)) as agen:
+                    async for response in agen:
+                        yielded = True
+                        yield response
+            except Exception as e:
+                error = e
+            finally:
+                kind = gov.release(error)  # คืน slot เสมอ แม้ caller ปิด generator กลางทาง
+            if error is None:
+                return
+            if yielded or kind == "error" or attempt + 1 >= gov.attempts:
+                raise error
+            record_retry("gemini", str(status_of(error) or kind))
+            await asyncio.sleep(gov.backoff(attempt))
+
+
+@functools.lru_cache(maxsize=None)
+def _model_for(name: str) -> Gemini:
+    return GovernedGemini(model=name, retry_options=RETRY_OPTIONS)
+
+
+def get_model(name: Optional[str] = None) -> Gemini:
+    """Shared Gemini for ``name`` (default: the MODEL env var)."""
+    return _model_for(name or os.getenv("MODEL") or DEFAULT_MODEL)
@@ -4,43 +4,72 @@ import logging
 
 sys.path.append("..")
 from callback_logging import log_query_to_model, log_model_response
+from logging_setup import setup_logging
+from model_registry import get_model
 from dotenv import load_dotenv
-import google.cloud.logging
 from google.adk import Agent
-from google.adk.models import Gemini
 from google.genai import types
 from typing import Optional, List, Dict
 
 from google.adk.tools.tool_context import ToolContext
 
-load_dotenv()
+from .attractions import PAGE_SIZE, attraction_index
 
-cloud_logging_client = google.cloud.logging.Client()
-cloud_logging_client.setup_logging()
+load_dotenv()
 
-RETRY_OPTIONS = types.HttpRetryOptions(initial_delay=1, attempts=6)
+setup_logging()
 
 # Tools (add the tool here when instructed)
+def find_attractions(
+    country: str = "",
+    query: str = "",
+    category: str = "",
+    page: int = 1,
+    page_size: int = PAGE_SIZE,
+) -> Dict[str, object]:
+    """
+    Look up attractions in the local travel dataset.
+    country: country name or code (e.g. "Japan", "UK"); empty = all countries.
+    query: attraction name or the start of it (typos are tolerated); empty = any.
+    category: one of adventure / art / learning / leisure / shopping; empty = any.
+    page / page_size: results are paged (page starts at 1).
+    Return schema:
+      { status: "success", country: str, category: str, match: "all"/"prefix"/"fuzzy",
+        total: int, page: int, pages: int,
+        results: [ { name: str, region: str, category: str, country: str } ],
+        countries: { country: count }  (only when no country was given) }
+      or { status: "error", error_message: str, ... }
+    """
+    result = attraction_index().search(country, query, category, page, page_size)
+    logging.info(
+        f"[find_attractions] country={country!r} query={query!r} category={category!r} "
+        f"page={page} -> {result.get('total', result.get('error_message'))}"
+    )
+    return result
 
 
 # Agents
 
 attractions_planner = Agent(
     name="attractions_planner",
-    model=Gemini(model=os.getenv("MODEL"), retry_options=RETRY_OPTIONS),
+    model=get_model(os.getenv("MODEL")),
     description="Build a list of attractions to visit in a country.",
     instruction="""
         - Provide the user options for attractions to visit within their selected country.
+        - Use find_attractions(country=...) to get the options; add category=...
+          when the user has a travel goal, or query=... when they name a place.
+        - If there are more pages and the user wants more, call it again with the next page.
+        - If the country is not in the dataset, say so and suggest from your own knowledge.
         """,
     before_model_callback=log_query_to_model,
     after_model_callback=log_model_response,
     # When instructed to do so, paste the tools parameter below this line
-
+    tools=[find_attractions],
     )
 
 travel_brainstormer = Agent(
     name="travel_brainstormer",
-    model=Gemini(model=os.getenv("MODEL"), retry_options=RETRY_OPTIONS),
+    model=get_model(os.getenv("MODEL")),
     description="Help a user decide what country to visit.",
     instruction="""
         Provide a few suggestions of popular countries for travelers.
@@ -50,14 +79,17 @@ travel_brainstormer = Agent(
 
         Identify countries that would make great destinations
         based on their priorities.
+        Use find_attractions(category=<goal>) (no country) to see which countries
+        have the most attractions for that goal, and mention one or two of them.
         """,
     before_model_callback=log_query_to_model,
     after_model_callback=log_model_response,
+    tools=[find_attractions],
 )
 
 root_agent = Agent(
     name="steering",
-    model=Gemini(model=os.getenv("MODEL"), retry_options=RETRY_OPTIONS),
+    model=get_model(os.getenv("MODEL")),
     description="Start a user on a travel adventure.",
     instruction="""
         Ask the user if they know where they'd like to travel
@@ -0,0 +1,194 @@
+"""Local country -> attractions index for the travel agents.
+
+The dataset (``data/attractions.json``, or ``ATTRACTIONS_PATH``) is read
+on the first lookup only and kept as flat columns: name / region tuples,
+one byte per row for the category and a row range per country. Names are
+indexed by every word suffix ("mount fuji", "fuji") in one sorted list, so
+a prefix lookup is a bisect; queries with no prefix hit fall back to
+difflib close matches against whole keys and against keys cut to the
+query's length (a misspelt word start).
+"""
+import bisect
+import difflib
+import functools
+import json
+import os
+import unicodedata
+from array import array
+from typing import Any, Optional
+
+
+DATA_PATH = os.getenv(
+    "ATTRACTIONS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "attractions.json"),
+)
+PAGE_SIZE = 5
+MAX_PAGE_SIZE = 20
+FUZZY_CUTOFF = 0.75
+
+
+def normalize(text: str) -> str:
+    """casefold, strip accents and punctuation, collapse spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c if c.isalnum() else " " for c in text if not unicodedata.combining(c))
+    return " ".join(text.casefold().split())
+
+
+class AttractionIndex:
+    """Compact, read-only index over the attractions dataset."""
+
+    def __init__(self, data: dict[str, Any]):
+        self.categories: tuple[str, ...] = tuple(data["categories"])
+        category_id = {c: i for i, c in enumerate(self.categories)}
+
+        self.countries: tuple[str, ...] = tuple(sorted(data["countries"]))
+        self._country_keys: dict[str, int] = {}
+        self._ranges: list[tuple[int, int]] = []
+
+        names: list[str] = []
+        regions: list[str] = []
+        shared: dict[str, str] = {}  # region ซ้ำกันเยอะ -> ใช้ string object เดียวกัน
+        self._category = array("B")
+        self._country = array("H")
+        for cid, country in enumerate(self.countries):
+            entry = data["countries"][country]
+            for key in [country, *entry.get("aliases", [])]:
+                self._country_keys[normalize(key)] = cid
+            start = len(names)
+            for name, region, category in entry["attractions"]:
+                names.append(name)
+                regions.append(shared.setdefault(region, region))
+                self._category.append(category_id[category])
+                self._country.append(cid)
+            self._ranges.append((start, len(names)))
+        self._names = tuple(names)
+        self._regions = tuple(regions)
+
+        # key ต่อ word suffix ของชื่อ เรียงไว้ให้ bisect หา prefix ได้
+        pairs = []
+        for row, name in enumerate(self._names):
+            words = normalize(name).split()
+            pairs.extend((" ".join(words[i:]), row) for i in range(len(words)))
+        pairs.sort()
+        self._keys = [k for k, _ in pairs]
+        self._key_rows = array("H", (r for _, r in pairs))
+        self._full_keys = sorted(set(self._keys))
+
+    @classmethod
+    def load(cls, path: str = DATA_PATH) -> "AttractionIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    # --- lookups ---
+    def country_id(self, text: str) -> Optional[int]:
+        """Country by name / alias, tolerating small typos."""
+        key = normalize(text)
+        if key in self._country_keys:
+            return self._country_keys[key]
+        close = difflib.get_close_matches(key, self._country_keys, n=1, cutoff=FUZZY_CUTOFF)
+        return self._country_keys[close[0]] if close else None
+
+    def _prefix_rows(self, query: str) -> list[int]:
+        rows = []
+        i = bisect.bisect_left(self._keys, query)
+        while i < len(self._keys) and self._keys[i].startswith(query):
+            rows.append(self._key_rows[i])
+            i += 1
+        return rows
+
+    def _fuzzy_rows(self, query: str) -> list[int]:
+        """Close matches against whole keys and against keys cut to the query's
+        length, so a misspelt start of a word ("eifel") still finds "eiffel tower"."""
+        # key ทุกตัวเป็น word suffix อยู่แล้ว -> ตัดให้ยาวเท่า query = เทียบกับต้นคำทุกคำ
+        cut: dict[str, list[str]] = {}
+        for key in self._full_keys:
+            cut.setdefault(key[:len(query)], []).append(key)
+        keys = set(difflib.get_close_matches(query, self._full_keys, n=10, cutoff=FUZZY_CUTOFF))
+        for head in difflib.get_close_matches(query, cut, n=10, cutoff=FUZZY_CUTOFF):
+            keys.update(cut[head])
+        rows = []
+        for key in sorted(keys):
+            i = bisect.bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i] == key:
+                rows.append(self._key_rows[i])
+                i += 1
+        return rows
+
+    def row(self, row: int) -> dict[str, str]:
+        return {
+            "name": self._names[row],
+            "region": self._regions[row],
+            "category": self.categories[self._category[row]],
+            "country": self.countries[self._country[row]],
+        }
+
+    def search(self, country: str = "", query: str = "", category: str = "",
+               page: int = 1, page_size: int = PAGE_SIZE) -> dict[str, Any]:
+        """Filter by country / name (prefix, then fuzzy) / category, one page at a time."""
+        cid = None
+        if country:
+            cid = self.country_id(country)
+            if cid is None:
+                return {
+                    "status": "error",
+                    "error_message": f"No attractions data for {country!r}.",
+                    "known_countries": list(self.countries),
+                }
+        cat = normalize(category)
+        if cat and cat not in self.categories:
+            return {
+                "status": "error",
+                "error_message": f"Unknown category {category!r}.",
+                "categories": list(self.categories),
+            }
+
+        cat_id = self.categories.index(cat) if cat else None
+
+        def keep(rows) -> list[int]:
+            return [r for r in rows
+                    if (cid is None or self._country[r] == cid)
+                    and (cat_id is None or self._category[r] == cat_id)]
+
+        q = normalize(query)
+        match = "all"
+        if q:
+            rows, match = keep(self._prefix_rows(q)), "prefix"
+            if not rows:
+                rows, match = keep(self._fuzzy_rows(q)), "fuzzy"
+            # ลำดับในไฟล์ = ความนิยม; ชื่อที่ตรงกันหลาย key นับครั้งเดียว
+            rows = sorted(set(rows))
+        else:
+            rows = keep(range(*self._ranges[cid]) if cid is not None else range(len(self._names)))
+
+        page_size = max(1, min(int(page_size or PAGE_SIZE), MAX_PAGE_SIZE))
+        total = len(rows)
+        pages = max(1, -(-total // page_size))
+        page = max(1, min(int(page or 1), pages))
+        start = (page - 1) * page_size
+
+        result: dict[str, Any] = {
+            "status": "success",
+            "country": self.countries[cid] if cid is not None else "",
+            "category": cat,
+            "match": match,
+            "total": total,
+            "page": page,
+            "pages": pages,
+            "results": [self.row(r) for r in rows[start:start + page_size]],
+        }
+        if cid is None:
+            counts: dict[str, int] = {}
+            for r in rows:
+                name = self.countries[self._country[r]]
+                counts[name] = counts.get(name, 0) + 1
+            result["countries"] = counts
+        return result
+
+
+@functools.lru_cache(maxsize=1)
+def attraction_index() -> AttractionIndex:
+    """Shared index, loaded on first use."""
+    return AttractionIndex.load()
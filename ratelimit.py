@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from callback_logging import METRICS, record_retry
+
+
+# ----------------------------
+# Process-wide rate limiter / concurrency governor
+# ----------------------------
+# หนึ่ง Governor ต่อ backend ("gemini", "wiki") ใช้ร่วมกันทุก agent / session / thread
+#   - token bucket จำกัด request ต่อวินาที
+#   - จำกัดจำนวน request ที่ค้างอยู่พร้อมกัน (concurrency cap)
+#   - AIMD: เจอ 429/503 -> ลด rate และ concurrency ลงครึ่งหนึ่ง, สำเร็จ -> ค่อย ๆ เพิ่มกลับ
+#   - circuit breaker: ล้มติดกันเกิน threshold -> ปฏิเสธทันทีช่วงหนึ่ง แล้วลองใหม่ทีละ request
+# ตั้งค่าได้ด้วย env: RATE_<BACKEND>_QPS / _BURST / _CONCURRENCY / _ATTEMPTS เช่น RATE_GEMINI_QPS=2
+THROTTLE_STATUS = {429, 503}
+TRANSIENT_STATUS = {500, 502, 504}
+
+DEFAULTS = {
+    "gemini": {"qps": 5.0, "burst": 10, "concurrency": 8, "attempts": 6},
+    "wiki": {"qps": 10.0, "burst": 20, "concurrency": 6, "attempts": 3},
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """The backend failed repeatedly; calls are rejected until the cool-down ends."""
+
+
+def status_of(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by a google-genai APIError or a requests HTTPError."""
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify(exc: BaseException) -> str:
+    """'throttle' (429/503), 'transient' (5xx, timeouts) or 'error'."""
+    status = status_of(exc)
+    if status in THROTTLE_STATUS:
+        return "throttle"
+    if status in TRANSIENT_STATUS or isinstance(exc, (TimeoutError, ConnectionError)):
+        return "transient"
+    if type(exc).__name__ in ("Timeout", "ConnectTimeout", "ReadTimeout", "ConnectionError"):
+        return "transient"  # requests.exceptions ไม่ได้สืบทอดจาก builtin
+    return "error"
+
+
+class Governor:
+    """Token bucket + AIMD concurrency limit + circuit breaker for one backend."""
+
+    def __init__(self, name: str, qps: float, burst: int, concurrency: int, attempts: int = 3,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 min_qps: float = 0.2, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.name = name
+        self.max_qps = float(qps)
+        self.qps = float(qps)
+        self.min_qps = min(float(min_qps), float(qps))
+        self.burst = max(1, int(burst))
+        self.max_concurrency = max(1, int(concurrency))
+        self.limit = float(self.max_concurrency)
+        self.attempts = max(1, int(attempts))
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    # --- admission ---
+    def _try_acquire(self) -> float:
+        """Take a slot and a token; returns 0 on success or seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if self._opened_at is not None:
+                if now - self._opened_at < self.reset_timeout:
+                    raise CircuitOpenError(f"{self.name} circuit open")
+                if self._probing:
+                    return 0.05  # half-open: ให้ผ่านทีละ request
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.qps)
+            self._refilled = now
+            if self._in_flight >= max(1, int(self.limit)):
+                return 0.02
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.qps
+            self._tokens -= 1
+            self._in_flight += 1
+            if self._opened_at is not None:
+                self._probing = True
+            return 0.0
+
+    def acquire(self) -> float:
+        """Blocking acquire (worker threads); returns the queue wait in seconds."""
+        start = time.perf_counter()
+        while (delay := self._try_acquire()) > 0:
+            time.sleep(delay)
+        return self._waited(start)
+
+    async def acquire_async(self) -> float:
+        """Non-blocking acquire for coroutines; returns the queue wait in seconds."""
+        start = time.perf_counter()
+        while (delay := self._try_acquire()) > 0:
+            await asyncio.sleep(delay)
+        return self._waited(start)
+
+    def _waited(self, start: float) -> float:
+        waited = time.perf_counter() - start
+        METRICS.observe("limiter_wait_seconds", waited, backend=self.name)
+        return waited
+
+    # --- feedback ---
+    def release(self, exc: Optional[BaseException] = None) -> str:
+        """Return the slot and feed the outcome into AIMD / the breaker."""
+        kind = "ok" if exc is None else classify(exc)
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._probing = False
+            if kind == "ok":
+                self._failures = 0
+                self._opened_at = None
+                # additive increase
+                self.limit = min(self.max_concurrency, self.limit + 1 / max(1.0, self.limit))
+                self.qps = min(self.max_qps, self.qps + self.max_qps * 0.05)
+            elif kind in ("throttle", "transient"):
+                self._failures += 1
+                if kind == "throttle":
+                    # multiplicative decrease
+                    self.limit = max(1.0, self.limit / 2)
+                    self.qps = max(self.min_qps, self.qps / 2)
+                    self._tokens = min(self._tokens, 0.0)
+                if self._failures >= self.failure_threshold and self._opened_at is None:
+                    self._opened_at = time.monotonic()
+                    logging.warning(f"[ratelimit] {self.name} circuit opened after {self._failures} failures")
+                    METRICS.inc("limiter_circuit_open_total", backend=self.name)
+                elif self._opened_at is not None:
+                    self._opened_at = time.monotonic()  # probe ล้ม -> เปิดต่อ
+        if kind != "ok":
+            METRICS.inc("limiter_failures_total", backend=self.name, kind=kind)
+        return kind
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number ``attempt`` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    # --- helpers ---
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self.release(e)
+            raise
+        else:
+            self.release()
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking call under the limiter, retrying throttled/transient failures."""
+        for attempt in range(self.attempts):
+            try:
+                with self.slot():
+                    return fn(*args, **kwargs)
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                kind = classify(e)
+                if kind == "error" or attempt + 1 >= self.attempts:
+                    raise
+                record_retry(self.name, str(status_of(e) or kind))
+                time.sleep(self.backoff(attempt))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "qps": round(self.qps, 3),
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self._in_flight,
+                "consecutive_failures": self._failures,
+                "circuit": "closed" if self._opened_at is None else ("half-open" if self._probing else "open"),
+            }
+
+
+_governors: dict[str, Governor] = {}
+_governors_lock = threading.Lock()
+
+
+def governor(name: str) -> Governor:
+    """Process-wide Governor for a backend (created on first use from RATE_<NAME>_* env)."""
+    with _governors_lock:
+        gov = _governors.get(name)
+        if gov is None:
+            defaults = DEFAULTS.get(name, DEFAULTS["wiki"])
+            prefix = f"RATE_{name.upper()}_"
+            gov = _governors[name] = Governor(
+                name,
+                qps=float(os.getenv(prefix + "QPS", defaults["qps"])),
+                burst=int(os.getenv(prefix + "BURST", defaults["burst"])),
+                concurrency=int(os.getenv(prefix + "CONCURRENCY", defaults["concurrency"])),
+                attempts=int(os.getenv(prefix + "ATTEMPTS", defaults["attempts"])),
+            )
+        return gov
+
+
+def limiter_stats() -> dict[str, dict[str, Any]]:
+    with _governors_lock:
+        return {name: gov.stats() for name, gov in _governors.items()}
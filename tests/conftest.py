@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# ต้องตั้งก่อน import workflow_agents (cache / output ถูกสร้างตอน import)
+_TMP = tempfile.mkdtemp(prefix="court_tests_")
+os.environ["CACHE_DIR"] = os.path.join(_TMP, ".cache")
+os.environ["OUTPUT_DIR"] = os.path.join(_TMP, "outputs")
+os.environ.setdefault("WIKI_BACKEND", "online")
+os.environ.setdefault("LOG_SINK", "file")
+os.environ.setdefault("LOG_FILE", os.path.join(_TMP, "court.log"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
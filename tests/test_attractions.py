@@ -0,0 +1,11 @@
+from parent_and_subagents.attractions import attraction_index
+
+
+def test_fuzzy_search_tolerates_a_misspelt_word_start():
+    result = attraction_index().search("France", "eifel")
+    assert result["match"] == "fuzzy"
+    assert [r["name"] for r in result["results"]] == ["Eiffel Tower"]
+
+
+def test_fuzzy_search_without_a_close_name_is_empty():
+    assert attraction_index().search("Italy", "xyz")["total"] == 0
@@ -0,0 +1,37 @@
+import asyncio
+import os
+
+from benchmarks import fake_model
+from benchmarks.run_court import DEFAULT_FIXTURE
+from benchmarks.stub_wiki import StubWiki
+from workflow_agents import agent as court
+from workflow_agents.agent import verdict_filename
+from workflow_agents.batch import run_batch
+
+
+def test_verdict_filename_keeps_plain_topics_and_hashes_the_rest():
+    assert verdict_filename("Donald Trump") == "Donald_Trump.txt"
+    thai = [verdict_filename("ริชาร์ด นิกสัน"), verdict_filename("วินสตัน เชอร์ชิล")]
+    assert thai[0] != thai[1]
+    assert verdict_filename("Richard_Nixon") != verdict_filename("Richard Nixon (politician)")
+
+
+def test_batch_keeps_non_ascii_topics_apart(tmp_path):
+    for llm_agent, role in [(court.admirer, "admirer"), (court.critic_side, "critic"),
+                            (court.fact_translator, "translator")]:
+        llm_agent.model = fake_model.ScriptedModel(role=role)
+    topics = ["ริชาร์ด นิกสัน", "วินสตัน เชอร์ชิล"]
+
+    with StubWiki(DEFAULT_FIXTURE) as stub:
+        court.wiki_backend.api_url = stub.api_url
+        records = asyncio.run(run_batch(
+            topics, concurrency=2, manifest_path=str(tmp_path / "manifest.jsonl"), resume=False,
+        ))
+
+    assert [r["status"] for r in records] == ["ok", "ok"]
+    paths = [r["output_path"] for r in records]
+    assert len(set(paths)) == 2
+    for topic, path in zip(topics, paths):
+        with open(path, encoding="utf-8") as f:
+            assert topic in f.read()
+        assert os.path.basename(path) == verdict_filename(topic)
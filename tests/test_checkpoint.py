@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+from workflow_agents.batch import run_id_for
+from workflow_agents.checkpoint import delete_checkpoint, load_checkpoint, save_checkpoint
+
+
+def _ctx(run_id: str, topic: str, agent_name: str) -> SimpleNamespace:
+    state = {"run_id": run_id, "topic": topic, "loop_iteration": 1}
+    return SimpleNamespace(state=state, agent_name=agent_name, session=SimpleNamespace(id="s"))
+
+
+def test_run_ids_are_unique_per_topic():
+    topics = ["Richard Nixon", "richard-nixon", "ริชาร์ด นิกสัน", "วินสตัน เชอร์ชิล"]
+    ids = [run_id_for(t) for t in topics]
+    assert len(set(ids)) == len(ids)
+    assert run_id_for("Richard Nixon") == run_id_for("Richard Nixon")
+
+
+def test_save_checkpoint_does_not_reuse_another_topics_stages():
+    run_id = "collision-test"
+    delete_checkpoint(run_id)
+    save_checkpoint(_ctx(run_id, "หัวข้อ B", "trial_loop"))
+    save_checkpoint(_ctx(run_id, "หัวข้อ A", "prefetch"))
+
+    record = load_checkpoint(run_id)
+    assert record["stages"] == ["prefetch"]
+    assert record["state"]["topic"] == "หัวข้อ A"
+    delete_checkpoint(run_id)
@@ -0,0 +1,49 @@
+from workflow_agents.evidence import EvidenceStore, Fact, empty_evidence, split_fact_lines
+
+
+def test_parse_plain_fact():
+    fact = Fact.parse("FACT: Signed the Abraham Accords (Wikipedia: Abraham Accords)")
+    assert fact == Fact("", "Signed the Abraham Accords", "Abraham Accords")
+
+
+def test_parse_title_with_parentheses():
+    fact = Fact.parse("FACT[LEGAL]: Immunity ruling (Wikipedia: Trump v. United States (2024))")
+    assert fact.tag == "LEGAL"
+    assert fact.text == "Immunity ruling"
+    assert fact.title == "Trump v. United States (2024)"
+
+
+def test_parse_parentheses_in_text_and_title():
+    fact = Fact.parse("FACT: Act (TCJA) signed in 2017 (Wikipedia: Tax Cuts and Jobs Act (2017))")
+    assert fact.text == "Act (TCJA) signed in 2017"
+    assert fact.title == "Tax Cuts and Jobs Act (2017)"
+
+
+def test_parse_lowercase_and_spaced_tags():
+    assert Fact.parse("FACT[jan6]: Capitol attack (Wikipedia: X)").tag == "JAN6"
+    assert Fact.parse("FACT [LEGAL]: Indicted (Wikipedia: X)").tag == "LEGAL"
+    assert Fact.parse("FACT[ Other ] : Travel ban (Wikipedia: X)").tag == "OTHER"
+
+
+def test_parse_without_citation():
+    fact = Fact.parse("FACT: No source given")
+    assert fact == Fact("", "No source given", "")
+
+
+def test_line_round_trip():
+    line = "FACT[LEGAL]: Immunity ruling (Wikipedia: Trump v. United States (2024))"
+    assert Fact.parse(line).line() == line
+
+
+def test_split_several_facts_on_one_line():
+    blob = "FACT[LEGAL]: A (Wikipedia: P (2024)) FACT [jan6]: B (Wikipedia: Q) FACT[OTHER]: C (Wikipedia: R)"
+    facts = [Fact.parse(ln) for ln in split_fact_lines(blob)]
+    assert [(f.tag, f.title) for f in facts] == [("LEGAL", "P (2024)"), ("JAN6", "Q"), ("OTHER", "R")]
+
+
+def test_store_accepts_lowercase_tag_and_records_title():
+    store = EvidenceStore(empty_evidence())
+    outcome = store.add("neg", Fact.parse("FACT[jan6]: Capitol attack (Wikipedia: January 6 (2021))"))
+    assert outcome == "added"
+    assert store.titles("neg") == {"January 6 (2021)"}
+    assert store.missing_tags() == ["LEGAL", "OTHER"]
@@ -0,0 +1,25 @@
+import json
+
+from workflow_agents.wiki_offline import OfflineWikiBackend, build_index
+
+
+def _backend(tmp_path, titles):
+    dump = tmp_path / "pages.jsonl"
+    with open(dump, "w", encoding="utf-8") as f:
+        for i, title in enumerate(titles, 1):
+            f.write(json.dumps({"title": title, "text": f"{title} text", "id": i}) + "\n")
+    build_index(str(dump), str(tmp_path / "pages.idx"))
+    return OfflineWikiBackend(str(dump), str(tmp_path / "pages.idx"))
+
+
+def test_lookup_prefers_the_exact_title_among_case_variants(tmp_path):
+    backend = _backend(tmp_path, ["NIRVANA", "Nirvana", "Nirvana (band)"])
+    assert backend._lookup("Nirvana")[0] == "Nirvana"
+    assert backend._lookup("NIRVANA")[0] == "NIRVANA"
+    assert backend._lookup("nirvana")[0] in {"Nirvana", "NIRVANA"}
+
+
+def test_search_titles_prefix_stops_at_word_boundary(tmp_path):
+    backend = _backend(tmp_path, ["Richard Nixon", "Richard Nixon Library", "Richard Nixonland"])
+    assert backend._prefix("Richard Nixon", limit=5) == ["Richard Nixon Library"]
+    assert backend.search_titles("Richard Nixon", limit=2) == ["Richard Nixon", "Richard Nixon Library"]
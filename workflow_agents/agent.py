@@ -1,195 +1,439 @@
 import os
+import sys
+import asyncio
+import hashlib
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator
 from dotenv import load_dotenv
 
 from google.genai import types
 from google.adk import Agent
-from google.adk.agents import SequentialAgent, LoopAgent, ParallelAgent
-from google.adk.models import Gemini
-from google.adk.tools import exit_loop
+from google.adk.agents import BaseAgent, SequentialAgent, LoopAgent, ParallelAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
 from google.adk.tools.tool_context import ToolContext
 
-from langchain_community.utilities import WikipediaAPIWrapper
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from callback_logging import (
+    log_query_to_model, log_model_response,
+    start_agent_span, end_agent_span,
+    start_tool_span, end_tool_span,
+)
+from logging_setup import setup_logging
+from model_registry import get_model
+from ratelimit import governor
+
+from .checkpoint import clear_checkpoint, restore_checkpoint, save_checkpoint, skip_completed_stage
+from .disk_cache import DiskCache
+from .evidence import NEG_TAGS, EvidenceStore, Fact, empty_evidence, split_fact_lines
+from .llm_cache import cached_model_response, store_model_response
+from .ranking import BM25Index, rank_candidates, tag_terms, tokenize
+from .snippets import extract_snippets
+from .wiki_backend import OnlineWikiBackend
 
 
 # ----------------------------
 # Basic Logging + Env
 # ----------------------------
-logging.basicConfig(level=logging.INFO)
-
-# Cloud Logging ใน Qwiklabs บางครั้ง auth มีปัญหา metadata server
-try:
-    import google.cloud.logging  # type: ignore
-    cloud_logging_client = google.cloud.logging.Client()
-    cloud_logging_client.setup_logging()
-    logging.info("Cloud Logging enabled.")
-except Exception as e:
-    logging.warning(f"Cloud Logging disabled (safe fallback): {e}")
-
+# log ไปผ่าน queue + background thread (ไม่ block hot path); Cloud Logging เปิดได้ด้วย LOG_SINK=cloud
 load_dotenv()
+setup_logging()
 model_name = os.getenv("MODEL", "gemini-2.5-flash")
 logging.info(f"MODEL={model_name}")
 
-RETRY_OPTIONS = types.HttpRetryOptions(initial_delay=1, attempts=6)
-
-# Wikipedia wrapper (คืน title ได้จริง)
-wiki_api = WikipediaAPIWrapper(
-    lang="en",
-    top_k_results=5,
-    doc_content_chars_max=4000,
+# Wikipedia: ค้นชื่อหน้าก่อน (ถูก) แล้วค่อยโหลดเนื้อหาเฉพาะหน้าที่เลือก
+WIKI_SEARCH_CANDIDATES = int(os.getenv("WIKI_SEARCH_CANDIDATES", "10"))
+WIKI_MAX_WORKERS = int(os.getenv("WIKI_MAX_WORKERS", "6"))
+# ส่งให้โมเดลเฉพาะประโยคที่เกี่ยวข้อง (ลด prompt tokens)
+WIKI_SNIPPET_CHARS = int(os.getenv("WIKI_SNIPPET_CHARS", "1200"))
+WIKI_SNIPPET_SENTENCES = int(os.getenv("WIKI_SNIPPET_SENTENCES", "8"))
+
+# WIKI_BACKEND=online (ค่าเริ่มต้น) | offline (อ่านจาก dump ในเครื่อง ต้องมี WIKI_DUMP_PATH)
+WIKI_BACKEND = os.getenv("WIKI_BACKEND", "online").strip().lower()
+if WIKI_BACKEND == "offline":
+    from .wiki_offline import OfflineWikiBackend  # xml/bz2/mmap ใช้เฉพาะโหมด offline
+
+    _dump_path = os.environ["WIKI_DUMP_PATH"]
+    wiki_backend = OfflineWikiBackend(
+        dump_path=_dump_path,
+        index_path=os.getenv("WIKI_INDEX_PATH", _dump_path + ".idx"),
+        lang="en",
+        doc_content_chars_max=4000,
+    )
+else:
+    wiki_backend = OnlineWikiBackend(
+        lang="en",
+        doc_content_chars_max=4000,
+        pool_size=WIKI_MAX_WORKERS,
+    )
+logging.info(f"WIKI_BACKEND={WIKI_BACKEND}")
+
+_wiki_pool: ThreadPoolExecutor | None = None
+_page_index: BM25Index | None = None
+
+# Cache ผลค้นหา Wikipedia ลงดิสก์ (ใช้ซ้ำข้าม loop / topic / การรันใหม่)
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+wiki_cache = DiskCache(
+    path=os.getenv("WIKI_CACHE_PATH", os.path.join(CACHE_DIR, "wiki_cache.sqlite3")),
+    ttl_seconds=float(os.getenv("WIKI_CACHE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("WIKI_CACHE_MAX_ENTRIES", "5000")),
+    table=f"wiki_{WIKI_BACKEND}",
 )
 
 
 # ----------------------------
 # Tools
 # ----------------------------
+# key ทั้งหมดของ court state (ล้างทุกครั้งที่เริ่ม topic ใหม่)
+COURT_STATE_KEYS = [
+    "topic",
+    "pos_evidence", "neg_evidence",
+    "pos_facts", "neg_facts",
+    "pos_titles", "neg_titles",
+    "pos_suffix", "neg_suffix",
+    "required_neg_tags",
+    "pos_candidates", "neg_candidates",
+    "pos_needed", "missing_neg_tags",
+    "verdict_source", "verdict_translations",
+    "loop_iteration", "completed_stages",
+    "output_path",
+]
+
+
+def initial_state(topic: str) -> dict[str, object]:
+    """Fresh court state for one topic (used by init_topic and the batch runner)."""
+    return {
+        "topic": (topic or "").strip(),
+        "pos_suffix": " achievements legacy impact reforms diplomacy economy",
+        "neg_suffix": " controversy impeachment January 6 investigation indictment",
+        **empty_evidence(NEG_TAGS),
+        "loop_iteration": 0,
+    }
+
+
 def init_topic(tool_context: ToolContext, topic: str) -> dict[str, str]:
     """Initialize state for a new topic."""
     # ล้าง state เก่าทีละ key (State ไม่มี .clear())
-    for k in [
-        "topic",
-        "pos_data", "neg_data",
-        "pos_titles_used", "neg_titles_used",
-        "pos_suffix", "neg_suffix",
-        "required_neg_tags",
-        "output_path",
-    ]:
+    for k in COURT_STATE_KEYS:
         try:
             tool_context.state.pop(k, None)
         except Exception:
             pass
 
-    tool_context.state["topic"] = (topic or "").strip()
-    tool_context.state["pos_data"] = []
-    tool_context.state["neg_data"] = []
+    for k, v in initial_state(topic).items():
+        tool_context.state[k] = v
+    return {"status": "success"}
 
-    tool_context.state["pos_titles_used"] = []
-    tool_context.state["neg_titles_used"] = []
 
-    tool_context.state["pos_suffix"] = " achievements legacy impact reforms diplomacy economy"
-    tool_context.state["neg_suffix"] = " controversy impeachment January 6 investigation indictment"
+def _titles_used(state) -> set[str]:
+    return EvidenceStore.from_state(state).titles()
 
-    tool_context.state["required_neg_tags"] = ["FACT[LEGAL]:", "FACT[JAN6]:", "FACT[OTHER]:"]
-    return {"status": "success"}
+
+def _wiki_call(fn, *args, **kwargs):
+    """Backend call through the shared "wiki" limiter (online API only)."""
+    if WIKI_BACKEND == "offline":
+        return fn(*args, **kwargs)
+    return governor("wiki").call(fn, *args, **kwargs)
+
+
+def _search_titles(q: str) -> list[str]:
+    """Candidate titles for a normalized query (cached, no page content)."""
+    cache_key = f"titles:{q.lower()}"
+    cached = wiki_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    titles = _wiki_call(wiki_backend.search_titles, q, limit=WIKI_SEARCH_CANDIDATES)
+    wiki_cache.set(cache_key, titles)
+    return titles
 
 
-def wiki_search(tool_context: ToolContext, query: str) -> dict[str, str]:
+def page_index() -> BM25Index:
+    """BM25 index over every page fetched so far (warmed from the disk cache once)."""
+    global _page_index
+    if _page_index is None:
+        index = BM25Index()
+        for _, page in wiki_cache.iter_prefix("page:"):
+            if isinstance(page, dict) and page.get("title"):
+                index.add(page["title"], page.get("content", ""))
+        logging.info(f"[page_index] warmed with {len(index)} cached pages")
+        _page_index = index
+    return _page_index
+
+
+def _leaning(title: str) -> str:
+    """"pos" / "neg" by BM25 score of the POS vs NEG keywords ("" on a tie or an unknown page)."""
+    index = page_index()
+    pos_score = index.score(tag_terms("POS"), title)
+    neg_score = index.score(tag_terms("NEG"), title)
+    return "pos" if pos_score > neg_score else "neg" if neg_score > pos_score else ""
+
+
+def _fetch_page(title: str) -> dict | None:
+    """Content of exactly one page (cached by title)."""
+    cache_key = f"page:{title}"
+    page = wiki_cache.get(cache_key)
+    if page is None:
+        page = _wiki_call(wiki_backend.fetch_page, title)
+        # หน้าที่ไม่มี / disambiguation ก็ cache ไว้ (False) จะได้ไม่ขอซ้ำ
+        wiki_cache.set(cache_key, page if page is not None else False)
+    if not page:
+        return None
+
+    page_index().add(page["title"], page.get("content", ""))
+    return page
+
+
+def _snippet(content: str, query: str, tag: str, char_budget: int = WIKI_SNIPPET_CHARS) -> dict[str, object]:
+    return extract_snippets(content, query, tag, top_k=WIKI_SNIPPET_SENTENCES, char_budget=char_budget)
+
+
+def wiki_search(tool_context: ToolContext, query: str, tag: str = "") -> dict[str, object]:
     """
     Search Wikipedia and return a single best page title + content snippet.
+    Candidates are ranked locally (BM25 over fetched pages) against the query
+    plus the tag category (POS / LEGAL / JAN6 / OTHER). Titles already used
+    by either side are skipped, and only the returned
+    page is downloaded. content holds only the most relevant sentences;
+    chars_original / chars_returned report how much was trimmed.
     Return schema:
-      { ok: "true"/"false", title: str, content: str }
+      { ok: "true"/"false", title: str, content: str, chars_original: int, chars_returned: int }
     """
     q = " ".join((query or "").split()).strip()
     if not q:
         return {"ok": "false", "title": "", "content": ""}
 
     try:
-        docs = wiki_api.load(q)
+        titles = _search_titles(q)
     except Exception as e:
         logging.warning(f"[wiki_search error] {e}")
         return {"ok": "false", "title": "", "content": ""}
 
-    if not docs:
-        return {"ok": "false", "title": "", "content": ""}
+    used = _titles_used(tool_context.state)
+    for title in rank_candidates(page_index(), q, tag, titles, used):
+        try:
+            page = _fetch_page(title)
+        except Exception as e:
+            logging.warning(f"[wiki_search fetch error] {title}: {e}")
+            continue
+        # redirect อาจพาไปหน้าที่เคยใช้แล้ว -> ข้าม (เหมือน _gather_pages)
+        if page and page.get("content") and page["title"] not in used:
+            snip = _snippet(page["content"], q, tag)
+            return {
+                "ok": "true",
+                "title": page["title"],
+                "content": snip["content"],
+                "chars_original": snip["chars_original"],
+                "chars_returned": snip["chars_returned"],
+            }
+
+    return {"ok": "false", "title": "", "content": ""}
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _wiki_pool
+    if _wiki_pool is None:
+        _wiki_pool = ThreadPoolExecutor(max_workers=WIKI_MAX_WORKERS, thread_name_prefix="wiki")
+    return _wiki_pool
+
+
+def _safe_search_titles(q: str) -> list[str]:
+    try:
+        return _search_titles(q)
+    except Exception as e:
+        logging.warning(f"[wiki_search_many error] {q}: {e}")
+        return []
 
-    d0 = docs[0]
-    title = ""
+
+def _safe_fetch_page(title: str) -> dict | None:
     try:
-        title = (d0.metadata or {}).get("title", "") or ""
-    except Exception:
-        title = ""
+        return _fetch_page(title)
+    except Exception as e:
+        logging.warning(f"[wiki_search_many fetch error] {title}: {e}")
+        return None
 
-    content = (d0.page_content or "").strip()
-    return {"ok": "true", "title": title, "content": content}
 
+def _normalize_queries(queries: list[str]) -> list[str]:
+    qs: list[str] = []
+    for query in queries or []:
+        q = " ".join((query or "").split()).strip()
+        if q and q.lower() not in {x.lower() for x in qs}:
+            qs.append(q)
+    return qs
 
-def append_title_used(tool_context: ToolContext, key: str, title: str) -> dict[str, str]:
-    """Store used Wikipedia page titles to prevent duplicates."""
-    title = " ".join((title or "").split()).strip()
-    existing = tool_context.state.get(key, [])
-    if not isinstance(existing, list):
-        existing = []
 
-    if title and title not in existing:
-        existing.append(title)
-        tool_context.state[key] = existing
-        logging.info(f"[Title added to {key}] {title}")
+def _gather_pages(qs: list[str], used: set[str], limit: int, tag: str = "") -> list[dict[str, str]]:
+    """Resolve all queries concurrently and fetch up to `limit` distinct unused pages.
+    With a tag, the pages are returned best-first by BM25 (query + tag keywords).
+    """
+    title_lists = list(_pool().map(_safe_search_titles, qs))
+
+    # รอบแรกเอาหน้าแรกที่ยังไม่ใช้ของแต่ละ query ก่อน แล้วค่อยเติมจากอันดับถัดไป
+    picked: list[tuple[str, str]] = []
+    seen = set(used)
+    depth = max((len(t) for t in title_lists), default=0)
+    for rank in range(depth):
+        for q, titles in zip(qs, title_lists):
+            if rank < len(titles) and titles[rank] not in seen:
+                seen.add(titles[rank])
+                picked.append((q, titles[rank]))
+
+    # หน้าที่เอียงไปอีกฝั่งชัดเจน (เช่น หน้าคดีความตอนค้นฝั่งบวก) ไม่ส่งให้ฝั่งนี้
+    side = "pos" if tag.upper() == "POS" else "neg" if tag else ""
+    results = []
+    returned = set(used)
+    # ดึงทีละชุด (เผื่อไว้ 2 เท่า เพราะบางหน้าอาจเป็น disambiguation / เอียงไปอีกฝั่ง)
+    # ชุดถัดไปถูกดึงเฉพาะเมื่อยังได้ไม่ครบ limit
+    batch = limit * 2
+    for start in range(0, len(picked), batch):
+        candidates = picked[start:start + batch]
+        pages = list(_pool().map(_safe_fetch_page, [t for _, t in candidates]))
+        for (q, _), page in zip(candidates, pages):
+            if not page or not page.get("content") or page["title"] in returned:
+                continue
+            if side and _leaning(page["title"]) not in ("", side):
+                continue
+            returned.add(page["title"])
+            results.append({"query": q, "title": page["title"], "content": page["content"]})
+        if len(results) >= limit:
+            break
 
+    # เรียงจากหน้าที่ดึงมาแล้วทั้งหมดก่อนตัดเหลือ limit
+    if tag:
+        index = page_index()
+        results.sort(key=lambda r: -index.score(tokenize(r["query"]) + tag_terms(tag), r["title"]))
+    return results[:limit]
+
+
+def wiki_search_many(tool_context: ToolContext, queries: list[str], limit: int = 5, tag: str = "") -> dict[str, object]:
+    """
+    Run several Wikipedia searches at once and return distinct, unused pages.
+    All queries are resolved concurrently, then up to `limit` pages (never a
+    title already used by either side) are fetched in parallel
+    and ordered best-first for the tag category (POS / NEG / LEGAL / JAN6 / OTHER).
+    Each content is trimmed to the sentences most relevant to its query.
+    Return schema:
+      { ok: "true"/"false", results: [ { query: str, title: str, content: str } ],
+        chars_original: int, chars_returned: int }
+    """
+    qs = _normalize_queries(queries)
+    if not qs:
+        return {"ok": "false", "results": []}
+
+    limit = max(1, min(int(limit or 5), 10))
+    results = _gather_pages(qs, _titles_used(tool_context.state), limit, tag)
+
+    chars_original = chars_returned = 0
+    for r in results:
+        snip = _snippet(r["content"], r["query"], tag)
+        r["content"] = snip["content"]
+        chars_original += snip["chars_original"]
+        chars_returned += snip["chars_returned"]
+    return {
+        "ok": "true" if results else "false",
+        "results": results,
+        "chars_original": chars_original,
+        "chars_returned": chars_returned,
+    }
+
+
+def append_title_used(tool_context: ToolContext, side: str, title: str) -> dict[str, str]:
+    """Mark a Wikipedia page title as used by side "pos" or "neg" (prevents duplicates)."""
+    if side not in ("pos", "neg"):
+        return {"status": "ignored"}
+    store = EvidenceStore.from_state(tool_context.state)
+    if store.use_title(side, title):
+        store.save(tool_context.state, side)
+        logging.info(f"[Title added to {side}] {title}")
     return {"status": "success"}
 
 
-def append_fact(tool_context: ToolContext, key: str, fact: str) -> dict:
-    """Append fact(s) into pos_data / neg_data with dedup and cap=3.
+def _page_meta(title: str) -> tuple[str, str]:
+    """(pageid, revision) of a page we already fetched, if it is in the cache."""
+    page = wiki_cache.get(f"page:{title}") if title else None
+    if not isinstance(page, dict):
+        return "", ""
+    return str(page.get("pageid") or ""), str(page.get("revision") or "")
+
+
+def append_fact(tool_context: ToolContext, side: str, fact: str) -> dict:
+    """Append fact(s) to side "pos" or "neg" with dedup and cap=3.
     If model returns multiple FACT lines in one blob, split and store them.
+    Negative facts are accepted only for a FACT[LEGAL|JAN6|OTHER] tag that is still missing.
     """
-    if key not in ("pos_data", "neg_data"):
+    if side not in ("pos", "neg"):
         return {"status": "ignored"}
 
-    data = tool_context.state.get(key, [])
-    if not isinstance(data, list):
-        data = []
-
-    blob = (fact or "").strip()
-    if not blob:
+    lines = split_fact_lines(fact)
+    if not lines:
         return {"status": "empty"}
 
-    # --- Split strategy ---
-    lines = []
-
-    # 1) Normal newline split
-    for ln in blob.splitlines():
-        ln = " ".join(ln.split()).strip()
-        if ln:
-            lines.append(ln)
-
-    # 2) If still looks like combined FACTs in one line, split by tags/prefix
-    if len(lines) == 1:
-        one = lines[0]
-        if key == "neg_data" and ("FACT[LEGAL]:" in one and "FACT[JAN6]:" in one and "FACT[OTHER]:" in one):
-            parts = re.split(r"(?=FACT\[(?:LEGAL|JAN6|OTHER)\]:)", one)
-            lines = [p.strip() for p in parts if p.strip()]
-        elif key == "pos_data" and one.count("FACT:") >= 2:
-            parts = re.split(r"(?=FACT:)", one)
-            lines = [p.strip() for p in parts if p.strip()]
-
+    store = EvidenceStore.from_state(tool_context.state)
     added = 0
+    rejected = 0
     for ln in lines:
-        if len(data) >= 3:
+        parsed = Fact.parse(ln)
+        pageid, revision = _page_meta(parsed.title)
+        outcome = store.add(side, parsed._replace(pageid=pageid, revision=revision))
+        if outcome == "full":
             break
-        if ln not in data:
-            data.append(ln)
+        if outcome == "added":
             added += 1
+        elif outcome == "rejected":
+            rejected += 1
 
-    tool_context.state[key] = data
-    return {"status": "ok", "added": added, "count": len(data)}
+    store.save(tool_context.state, side)
+    return {"status": "ok", "added": added, "rejected": rejected, "count": store.count(side)}
 
 
-def check_neg_tags(tool_context: ToolContext) -> dict[str, object]:
+def check_neg_tags(state) -> dict[str, object]:
     """Validate negative tags presence and count."""
-    required = tool_context.state.get("required_neg_tags", [])
-    neg_data = tool_context.state.get("neg_data", [])
+    store = EvidenceStore.from_state(state)
+    missing = store.missing_tags()
+    neg_count = store.count("neg")
+    return {
+        "ok": not missing and neg_count == len(store.required_tags),
+        "present": {tag: tag not in missing for tag in store.required_tags},
+        "missing": missing,
+        "neg_count": neg_count,
+    }
 
-    present = {tag: False for tag in required}
-    for line in neg_data:
-        for tag in required:
-            if isinstance(line, str) and line.startswith(tag):
-                present[tag] = True
 
-    ok = all(present.values()) and isinstance(neg_data, list) and len(neg_data) == 3
-    return {"ok": ok, "present": present, "neg_count": len(neg_data) if isinstance(neg_data, list) else 0}
+def side_todo(state, side: str) -> dict[str, object]:
+    """What one side still has to collect: {"done": bool, "needed": int, "missing_tags": [...]}."""
+    if side == "pos":
+        needed = max(0, 3 - EvidenceStore.from_state(state).count("pos"))
+        return {"done": needed == 0, "needed": needed, "missing_tags": []}
 
+    tags = check_neg_tags(state)
+    missing = list(tags["missing"])
+    return {"done": bool(tags["ok"]), "needed": len(missing), "missing_tags": missing}
 
-def set_suffixes(tool_context: ToolContext, pos_suffix: str, neg_suffix: str) -> dict[str, str]:
-    """Judge refines search keywords for the next loop iteration."""
-    tool_context.state["pos_suffix"] = pos_suffix
-    tool_context.state["neg_suffix"] = neg_suffix
-    logging.info(f"[Suffix updated] pos_suffix={pos_suffix} | neg_suffix={neg_suffix}")
-    return {"status": "success"}
+
+def topic_hash(topic: str) -> str:
+    """Short hash of the exact topic text (unique per topic, like translation_key)."""
+    return hashlib.sha256((topic or "").encode("utf-8")).hexdigest()[:16]
+
+
+def verdict_filename(topic: str) -> str:
+    """<topic>.txt when the topic survives sanitising; otherwise <stem>-<topic hash>.txt.
+
+    Topics that are not plain ASCII (e.g. Thai) would all become "____.txt"
+    and overwrite each other's report in a batch.
+    """
+    topic = (topic or "").strip()
+    safe = re.sub(r"[^a-zA-Z0-9_\-\.]", "_", topic.replace(" ", "_"))
+    lossless = safe == topic or ("_" not in topic and safe == topic.replace(" ", "_"))
+    if lossless and re.search(r"[a-zA-Z0-9]", safe):
+        return f"{safe}.txt"
+    stem = re.sub(r"_+", "_", safe).strip("_.-") or "verdict"
+    return f"{stem}-{topic_hash(topic)}.txt"
 
 
-def write_file(tool_context: ToolContext, directory: str, filename: str, content: str) -> dict[str, str]:
-    """Write final report to disk using a safe filename."""
+def _save_text(directory: str, filename: str, content: str) -> str:
+    """Write text to directory/<safe filename>.txt and return the path."""
     os.makedirs(directory, exist_ok=True)
 
     raw = filename or "output.txt"
@@ -202,59 +446,158 @@ def write_file(tool_context: ToolContext, directory: str, filename: str, content
     target_path = os.path.join(directory, safe)
     with open(target_path, "w", encoding="utf-8") as f:
         f.write(content or "")
-
-    tool_context.state["output_path"] = target_path
     logging.info(f"[Saved] {target_path}")
-    return {"status": "success", "path": target_path}
+    return target_path
+
+
+# ----------------------------
+# Evidence Prefetch (non-LLM)
+# ----------------------------
+# ต้องตรงกับ SEARCH STRATEGY ใน prompt ของ admirer / critic_side
+POS_QUERY_TEMPLATES = (
+    "{topic}",
+    "{topic} {pos_suffix}",
+    "{topic} presidency achievements",
+    "{topic} legacy",
+)
+NEG_QUERY_TEMPLATES = (
+    "{topic} controversy",
+    "{topic} {neg_suffix}",
+    "{topic} impeachment",
+    "{topic} investigation",
+    "{topic} January 6 United States Capitol attack",
+)
+PREFETCH_CHARS = int(os.getenv("PREFETCH_CHARS", "1500"))
+
+
+def _render_candidates(results: list[dict[str, str]], tag: str) -> str:
+    """Compact text block for the prompt: one header + relevant sentences per page."""
+    blocks = []
+    for i, r in enumerate(results, 1):
+        content = _snippet(r["content"], r["query"], tag, char_budget=PREFETCH_CHARS)["content"]
+        blocks.append(f"[{i}] {r['title']}\n{content}")
+    return "\n\n".join(blocks) if blocks else "(none)"
 
 
+class EvidencePrefetcher(BaseAgent):
+    """Fetch candidate pages for both sides before any LLM call.
+
+    The search strategies are fixed templates over topic / pos_suffix /
+    neg_suffix, so all of them are resolved here in parallel and the deduped,
+    trimmed pages are stored as pos_candidates / neg_candidates.
+    """
+
+    limit: int = 5
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        fields = {
+            "topic": state.get("topic", "") or "",
+            "pos_suffix": state.get("pos_suffix", "") or "",
+            "neg_suffix": state.get("neg_suffix", "") or "",
+        }
+        pos_qs = _normalize_queries([t.format(**fields) for t in POS_QUERY_TEMPLATES])
+        neg_qs = _normalize_queries([t.format(**fields) for t in NEG_QUERY_TEMPLATES])
+        used = _titles_used(state)
+
+        async def gather_side(side: str, qs: list[str]) -> list[dict[str, str]]:
+            # ฝั่งที่ครบแล้วไม่ต้องค้นซ้ำ
+            if side_todo(state, side)["done"]:
+                return []
+            return await asyncio.to_thread(_gather_pages, qs, used, self.limit, side.upper())
+
+        pos_results, neg_results = await asyncio.gather(
+            gather_side("pos", pos_qs),
+            gather_side("neg", neg_qs),
+        )
+        # หน้าเดียวกันไม่ควรถูกใช้ทั้งสองฝั่ง -> ให้ฝั่งที่คะแนน BM25 ของคำสำคัญสูงกว่า (เสมอกัน -> ฝั่งบวก)
+        shared = {r["title"] for r in pos_results} & {r["title"] for r in neg_results}
+        to_neg = {t for t in shared if _leaning(t) == "neg"}
+        pos_results = [r for r in pos_results if r["title"] not in to_neg]
+        neg_results = [r for r in neg_results if r["title"] not in shared or r["title"] in to_neg]
+
+        logging.info(f"[Prefetch] pos={len(pos_results)} neg={len(neg_results)} candidates")
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={
+                "pos_candidates": _render_candidates(pos_results, "POS"),
+                "neg_candidates": _render_candidates(neg_results, "NEG"),
+            }),
+        )
+
+
+prefetch = EvidencePrefetcher(
+    name="prefetch",
+    description="Pre-fetches and dedupes candidate Wikipedia pages for both sides (no LLM).",
+    before_agent_callback=start_agent_span,
+    after_agent_callback=[end_agent_span, save_checkpoint],
+)
+
 # ----------------------------
 # Agent A: Admirer (Positive)
 # ----------------------------
 admirer = Agent(
     name="admirer",
-    model=Gemini(model=model_name, retry_options=RETRY_OPTIONS),
+    model=get_model(model_name),
     description="Collects ONLY positive achievements / legacy from Wikipedia.",
     instruction="""
 TOPIC: { topic? }
 pos_suffix: { pos_suffix? }
-TITLES_USED: { pos_titles_used? }
+TITLES_USED: { pos_titles? }
+POS_DATA (already collected, keep as is):
+{ pos_facts? }
+NEEDED: { pos_needed? }
+
+CANDIDATES (already fetched Wikipedia pages, none of them in TITLES_USED):
+{ pos_candidates? }
 
 INSTRUCTIONS:
 - You are The Admirer.
 - Collect ONLY positive achievements, policies, diplomacy, legacy.
-- You MUST call wiki_search BEFORE writing EACH fact.
-- You MUST perform AT LEAST 3 separate wiki_search calls.
+- Write facts from CANDIDATES; search only when they are not enough.
 
-SEARCH STRATEGY (try in order, until you get a NEW page title):
+SEARCH STRATEGY (fallback; send ALL queries in a single wiki_search_many call):
 1) "{topic}"
 2) "{topic} {pos_suffix}"
 3) "{topic} presidency achievements"
 4) "{topic} legacy"
+- Only if it still returns too few usable pages, call wiki_search with another query.
 
 CITATION RULE (IMPORTANT):
-- After EACH Wikipedia search, you MUST cite the Wikipedia page title you used by ending the fact line with:
+- For EACH fact, you MUST cite the Wikipedia page title you used by ending the fact line with:
   (Wikipedia: <Page Title>)
 
 STRICT OUTPUT RULES:
-- Produce EXACTLY 3 lines.
+- Produce EXACTLY NEEDED new lines (facts already in POS_DATA are done; do NOT repeat them).
 - Each line MUST start with: FACT:
 - Each line MUST end with: (Wikipedia: Page Title)
-- The 3 lines MUST cite 3 DIFFERENT Wikipedia page titles (NO duplicates).
+- The lines MUST cite DIFFERENT Wikipedia page titles (NO duplicates).
 - DO NOT reuse any page title already listed in TITLES_USED.
 
-FOR EACH FACT (MANDATORY WORKFLOW):
-1) Call: wiki_search(query="...").
-2) From result, take title=result.title (must be non-empty).
-3) If title is empty OR title is already in TITLES_USED -> search again with another query.
-4) Call: append_title_used(key="pos_titles_used", title=title)
-5) Write ONE short positive fact from result.content.
-6) Call: append_fact(key="pos_data", fact="FACT: ... (Wikipedia: <title>)")
-
-Return ONLY the 3 lines. No extra text.
+MANDATORY WORKFLOW:
+1) Use CANDIDATES first. Only if fewer than NEEDED candidates are usable,
+   call wiki_search_many(queries=[...all strategy queries...], tag="POS") ONCE.
+2) FOR EACH FACT:
+a) Pick ONE page (from CANDIDATES or result.results) whose title is NOT in TITLES_USED.
+   If no usable page is left -> call wiki_search(query="...", tag="POS") with another query.
+b) Call: append_title_used(side="pos", title=title)
+c) Write ONE short positive fact from that page's content.
+d) Call: append_fact(side="pos", fact="FACT: ... (Wikipedia: <title>)")
+
+Return ONLY the new lines. No extra text.
 """,
-    tools=[wiki_search, append_fact, append_title_used],
+    tools=[wiki_search_many, wiki_search, append_fact, append_title_used],
     generate_content_config=types.GenerateContentConfig(temperature=0),
+    # ทุกอย่างที่ต้องใช้อยู่ใน state ของ template แล้ว -> ไม่ต้องส่ง history ของรอบก่อน ๆ
+    include_contents="none",
+    before_model_callback=[cached_model_response, log_query_to_model],
+    after_model_callback=[log_model_response, store_model_response],
+    before_tool_callback=start_tool_span,
+    after_tool_callback=end_tool_span,
+    before_agent_callback=start_agent_span,
+    after_agent_callback=end_agent_span,
 )
 
 # ----------------------------
@@ -262,33 +605,40 @@ Return ONLY the 3 lines. No extra text.
 # ----------------------------
 critic_side = Agent(
     name="critic_side",
-    model=Gemini(model=model_name, retry_options=RETRY_OPTIONS),
+    model=get_model(model_name),
     description="Collects ONLY negative / controversial facts from Wikipedia.",
     instruction="""
 TOPIC: { topic? }
 neg_suffix: { neg_suffix? }
-TITLES_USED: { neg_titles_used? }
+TITLES_USED: { neg_titles? }
+NEG_DATA (already collected, keep as is):
+{ neg_facts? }
+MISSING_TAGS: { missing_neg_tags? }
+
+CANDIDATES (already fetched Wikipedia pages, none of them in TITLES_USED):
+{ neg_candidates? }
 
 INSTRUCTIONS:
 - You are The Critic.
 - Collect ONLY controversies, legal issues, investigations, major disputes.
-- You MUST call wiki_search BEFORE writing EACH fact.
-- You MUST perform AT LEAST 3 separate wiki_search calls.
+- Write facts from CANDIDATES; search only when they are not enough.
 
-SEARCH STRATEGY (try in order, until you get a NEW page title):
+SEARCH STRATEGY (fallback; send ALL queries in a single wiki_search_many call):
 1) "{topic} controversy"
 2) "{topic} {neg_suffix}"
 3) "{topic} impeachment"
 4) "{topic} investigation"
 5) "{topic} January 6 United States Capitol attack"
+- Only if it still returns too few usable pages, call wiki_search with another query.
 
 CITATION RULE (IMPORTANT):
-- After EACH Wikipedia search, you MUST cite the Wikipedia page title you used by ending the fact line with:
+- For EACH fact, you MUST cite the Wikipedia page title you used by ending the fact line with:
   (Wikipedia: <Page Title>)
 
 STRICT OUTPUT RULES:
-- Produce EXACTLY 3 lines.
-- Use EACH tag EXACTLY ONCE (no more, no less), and in any order:
+- Write ONE line for EACH tag in MISSING_TAGS, and NOTHING else.
+- Tags already present in NEG_DATA are done; do NOT write them again.
+- Across NEG_DATA and your new lines, each tag appears EXACTLY ONCE:
   FACT[LEGAL]:
   FACT[JAN6]:
   FACT[OTHER]:
@@ -303,143 +653,334 @@ TAG MEANINGS (STRICT):
 - FACT[JAN6]: January 6 United States Capitol attack OR attempts to overturn the 2020 election.
 - FACT[OTHER]: major controversy/policy NOT primarily legal AND NOT Jan 6/election overturn.
 
-FOR EACH FACT (MANDATORY WORKFLOW):
-1) Call: wiki_search(query="...").
-2) From result, take title=result.title (must be non-empty).
-3) If title is empty OR title is already in TITLES_USED -> search again with another query.
-4) Call: append_title_used(key="neg_titles_used", title=title)
-5) Write ONE short negative fact from result.content that matches the tag category.
-6) Call: append_fact(key="neg_data", fact="<FULL LINE EXACTLY AS WRITTEN>")
-
-Return ONLY the 3 lines. No extra text.
+MANDATORY WORKFLOW:
+1) Use CANDIDATES first. Only if there are fewer usable candidates than tags in MISSING_TAGS,
+   call wiki_search_many(queries=[...all strategy queries...], tag="NEG") ONCE.
+2) FOR EACH FACT:
+a) Pick ONE page (from CANDIDATES or result.results) whose title is NOT in TITLES_USED.
+   If no usable page is left -> call wiki_search(query="...", tag="<LEGAL|JAN6|OTHER>") with another query,
+   using the tag you still need.
+b) Call: append_title_used(side="neg", title=title)
+c) Write ONE short negative fact from that page's content that matches the tag category.
+d) Call: append_fact(side="neg", fact="<FULL LINE EXACTLY AS WRITTEN>")
+
+Return ONLY the new lines. No extra text.
 """,
-    tools=[wiki_search, append_fact, append_title_used],
+    tools=[wiki_search_many, wiki_search, append_fact, append_title_used],
     generate_content_config=types.GenerateContentConfig(temperature=0),
+    # ทุกอย่างที่ต้องใช้อยู่ใน state ของ template แล้ว -> ไม่ต้องส่ง history ของรอบก่อน ๆ
+    include_contents="none",
+    before_model_callback=[cached_model_response, log_query_to_model],
+    after_model_callback=[log_model_response, store_model_response],
+    before_tool_callback=start_tool_span,
+    after_tool_callback=end_tool_span,
+    before_agent_callback=start_agent_span,
+    after_agent_callback=end_agent_span,
 )
 
 # ----------------------------
 # Step 2: Parallel Investigation
 # ----------------------------
+class SideGate(BaseAgent):
+    """Runs its single sub-agent only when that side still lacks evidence.
+
+    Before delegating it publishes what is missing (pos_needed or
+    missing_neg_tags), so a retry only asks for the facts that are absent.
+    """
+
+    side: str
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        todo = side_todo(ctx.session.state, self.side)
+        if todo["done"]:
+            logging.info(f"[{self.name}] {self.side} side complete, skipped")
+            return
+
+        if self.side == "pos":
+            delta = {"pos_needed": todo["needed"]}
+        else:
+            delta = {"missing_neg_tags": ", ".join(f"FACT[{t}]" for t in todo["missing_tags"])}
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=delta),
+        )
+
+        async for event in self.sub_agents[0].run_async(ctx):
+            yield event
+
+
 investigation = ParallelAgent(
     name="investigation",
     description="Runs Admirer and Critic in parallel to collect evidence.",
-    sub_agents=[admirer, critic_side],
+    sub_agents=[
+        SideGate(
+            name="admirer_gate", side="pos", sub_agents=[admirer],
+            before_agent_callback=start_agent_span, after_agent_callback=[end_agent_span, save_checkpoint],
+        ),
+        SideGate(
+            name="critic_gate", side="neg", sub_agents=[critic_side],
+            before_agent_callback=start_agent_span, after_agent_callback=[end_agent_span, save_checkpoint],
+        ),
+    ],
+    before_agent_callback=start_agent_span,
+    after_agent_callback=[end_agent_span, save_checkpoint],
 )
 
 # ----------------------------
 # Agent C: Judge (Loop Control)
 # ----------------------------
-judge = Agent(
-    name="judge",
-    model=Gemini(model=model_name, retry_options=RETRY_OPTIONS),
-    description="Checks evidence balance; refines keywords; ends ONLY via exit_loop.",
-    instruction="""
-TOPIC: { topic? }
+REFINED_POS_SUFFIX = " achievements presidency policy economy diplomacy reforms legacy"
+REFINED_NEG_SUFFIX = " controversy impeachment January 6 United States Capitol attack investigation indictment election interference"
 
-POS_DATA:
-{ pos_data? }
 
-NEG_DATA:
-{ neg_data? }
+def is_balanced(state) -> tuple[bool, dict[str, object]]:
+    """Balance rules of the review loop (same as the original judge prompt)."""
+    store = EvidenceStore.from_state(state)
+    pos_count, neg_count = store.count("pos"), store.count("neg")
+    tags = check_neg_tags(state)
 
-INSTRUCTIONS:
-1) Compute counts:
-   pos_count = number of items in pos_data (0 if empty)
-   neg_count = number of items in neg_data (0 if empty)
-
-2) Call check_neg_tags().
-- If check_neg_tags.ok is false, it is NOT balanced.
-
-3) Balanced if ALL:
-   - pos_count >= 3
-   - neg_count >= 3
-   - abs(pos_count - neg_count) <= 1
-   - check_neg_tags.ok == true
-
-4) If NOT balanced:
-   - Call set_suffixes to refine keywords for next iteration:
-     pos_suffix=" achievements presidency policy economy diplomacy reforms legacy"
-     neg_suffix=" controversy impeachment January 6 United States Capitol attack investigation indictment election interference"
-   - Reply briefly: "Not balanced, refining search keywords and continuing."
-   - IMPORTANT: Do NOT call exit_loop.
-
-5) If balanced:
-   - Call exit_loop tool now.
-   - Reply briefly: "Balanced, ending review loop."
+    balanced = (
+        pos_count >= 3
+        and neg_count >= 3
+        and abs(pos_count - neg_count) <= 1
+        and bool(tags["ok"])
+    )
+    return balanced, {"pos_count": pos_count, "neg_count": neg_count, "tags": tags}
 
-RULE:
-- The loop MUST end ONLY by calling exit_loop.
-""",
-    tools=[set_suffixes, check_neg_tags, exit_loop],
-    generate_content_config=types.GenerateContentConfig(temperature=0),
+
+TRIAL_MAX_ITERATIONS = 5
+
+
+class CodeJudge(BaseAgent):
+    """Deterministic judge: checks balance, refines suffixes or escalates.
+
+    Not balanced -> writes the refined pos_suffix / neg_suffix for the next
+    iteration. Balanced -> escalates, which ends the LoopAgent exactly like
+    the exit_loop tool did. The judge also counts loop_iteration in state,
+    so a run resumed from a checkpoint still stops after
+    TRIAL_MAX_ITERATIONS rounds in total.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        iteration = int(ctx.session.state.get("loop_iteration") or 0) + 1
+        balanced, report = is_balanced(ctx.session.state)
+        logging.info(f"[Judge] iteration={iteration} balanced={balanced} {report}")
+
+        if balanced or iteration >= TRIAL_MAX_ITERATIONS:
+            text = "Balanced, ending review loop." if balanced else "Iteration limit reached, ending review loop."
+            yield Event(
+                author=self.name,
+                invocation_id=ctx.invocation_id,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text=text)]),
+                actions=EventActions(state_delta={"loop_iteration": iteration}, escalate=True),
+            )
+            return
+
+        logging.info(f"[Suffix updated] pos_suffix={REFINED_POS_SUFFIX} | neg_suffix={REFINED_NEG_SUFFIX}")
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(
+                role="model",
+                parts=[types.Part(text="Not balanced, refining search keywords and continuing.")],
+            ),
+            actions=EventActions(state_delta={
+                "pos_suffix": REFINED_POS_SUFFIX,
+                "neg_suffix": REFINED_NEG_SUFFIX,
+                "loop_iteration": iteration,
+            }),
+        )
+
+
+judge = CodeJudge(
+    name="judge",
+    description="Checks evidence balance in code; refines keywords; ends the loop by escalating.",
+    before_agent_callback=start_agent_span,
+    after_agent_callback=[end_agent_span, save_checkpoint],
 )
 
 # ----------------------------
-# Step 3: Loop = (Investigation -> Judge)
+# Step 3: Loop = (Prefetch -> Investigation -> Judge)
 # ----------------------------
 trial_loop = LoopAgent(
     name="trial_loop",
     description="Repeats investigation and review until balanced evidence, then exits.",
-    sub_agents=[investigation, judge],
-    max_iterations=5,
+    sub_agents=[prefetch, investigation, judge],
+    max_iterations=TRIAL_MAX_ITERATIONS,
+    before_agent_callback=[skip_completed_stage, start_agent_span],
+    after_agent_callback=[end_agent_span, save_checkpoint],
 )
 
 # ----------------------------
 # Step 4: Verdict Writer
 # ----------------------------
-verdict_writer = Agent(
-    name="verdict_writer",
-    model=Gemini(model=model_name, retry_options=RETRY_OPTIONS),
-    description="Writes neutral Thai verdict and saves to outputs/<topic>.txt",
-    instruction="""
-DATA:
-TOPIC: { topic? }
-POS_DATA: { pos_data? }
-NEG_DATA: { neg_data? }
-
-INSTRUCTIONS (STRICT):
-- ห้ามตอบเป็น JSON / ห้ามใส่ ``` / ห้ามใส่ code block เด็ดขาด ให้พิมพ์เป็นข้อความล้วนเท่านั้น
-- เขียนรายงานภาษาไทยแบบเป็นกลาง
-- IMPORTANT: แปลทุกบรรทัดที่ขึ้นต้นด้วย FACT ให้เป็นไทย
-- ห้ามคงคำว่า "FACT:" หรือ "FACT[...]" ไว้ในรายงาน ให้แปลเป็น "ข้อเท็จจริง:" แทน
-- คงท้ายบรรทัด (Wikipedia: Page Title) ไว้
-
-FORMAT (ต้องมีครบ 1-6):
+TRANSLATION_LINE_RE = re.compile(r"^\s*(\d+)\s*[.)]\s*(.+?)\s*$", re.M)
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "outputs")
+
+# คำแปลของ FACT เดิม ๆ ใช้ซ้ำข้าม topic / การรันใหม่ (key = hash ของประโยค + ภาษา)
+# รายงานและ prompt ของ fact_translator เป็นภาษาไทยตายตัว จึงไม่เปิดให้ตั้งค่าภาษาผ่าน env
+VERDICT_LANG = "th"
+translation_cache = DiskCache(
+    path=os.getenv("TRANSLATION_CACHE_PATH", os.path.join(CACHE_DIR, "translations.sqlite3")),
+    ttl_seconds=float(os.getenv("TRANSLATION_CACHE_TTL", str(90 * 24 * 3600))),
+    max_entries=int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "20000")),
+    table="translations",
+)
 
-1) หัวข้อ: <topic>
 
-2) ข้อเท็จจริงด้านบวก
-- <แปลเป็นไทย> (Wikipedia: <Page Title>)
-- <แปลเป็นไทย> (Wikipedia: <Page Title>)
-- <แปลเป็นไทย> (Wikipedia: <Page Title>)
+def translation_key(line: str, lang: str = VERDICT_LANG) -> str:
+    normalized = " ".join((line or "").split())
+    return "tr:" + hashlib.sha256(f"{lang}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+def verdict_lines(state) -> list[str]:
+    """Fact sentences (no FACT prefix, no source) that need translating, pos first."""
+    store = EvidenceStore.from_state(state)
+    return [f.text for side in ("pos", "neg") for f in store.facts(side)]
+
+
+def parse_translations(text: str, count: int) -> list[str]:
+    """Numbered model output -> list aligned with the source lines ("" when missing)."""
+    out = [""] * count
+    for num, line in TRANSLATION_LINE_RE.findall(text or ""):
+        i = int(num) - 1
+        if 0 <= i < count and not out[i]:
+            out[i] = line
+    return out
+
+
+def render_verdict(state, translations: list[str]) -> str:
+    """Sections 1-6 of the Thai report; only the fact sentences come from the model."""
+    store = EvidenceStore.from_state(state)
+    pos, neg = store.facts("pos"), store.facts("neg")
+    thai = iter(translations)
+
+    def bullets(facts: list[Fact]) -> list[str]:
+        lines = []
+        for fact in facts:
+            text = next(thai, "") or fact.text  # แปลไม่ได้ -> ใช้ต้นฉบับ
+            source = f" (Wikipedia: {fact.title})" if fact.title else ""
+            lines.append(f"- {text}{source}")
+        return lines or ["- (ไม่มีข้อมูล)"]
+
+    pos_count, neg_count = len(pos), len(neg)
+    balanced, _ = is_balanced(state)
+    if pos_count > neg_count:
+        outcome = "ถูกมากกว่าผิด"
+    elif neg_count > pos_count:
+        outcome = "ผิดมากกว่าถูก"
+    else:
+        outcome = "สูสี"
+
+    return "\n".join([
+        f"1) หัวข้อ: {state.get('topic', '')}",
+        "",
+        "2) ข้อเท็จจริงด้านบวก",
+        *bullets(pos),
+        "",
+        "3) ข้อเท็จจริงด้านลบ/ข้อโต้แย้ง",
+        *bullets(neg),
+        "",
+        "4) ตรวจสมดุล:",
+        f"- pos_count = {pos_count}",
+        f"- neg_count = {neg_count}",
+        f"- สรุปว่า: {'สมดุล' if balanced else 'ไม่สมดุล'}",
+        "",
+        "5) กติกาตัดสิน:",
+        '- ถ้า pos_count > neg_count => "ถูกมากกว่าผิด"',
+        '- ถ้า neg_count > pos_count => "ผิดมากกว่าถูก"',
+        '- ถ้า pos_count == neg_count => "สูสี"',
+        f"6) ข้อสรุปสุดท้าย: {outcome} เพราะ {pos_count} ต่อ {neg_count}",
+        "",
+    ])
+
+
+fact_translator = Agent(
+    name="fact_translator",
+    model=get_model(model_name),
+    description="Translates the numbered fact sentences into Thai in one call.",
+    instruction="""
+แปลทุกบรรทัดด้านล่างเป็นภาษาไทยแบบเป็นกลาง
 
-3) ข้อเท็จจริงด้านลบ/ข้อโต้แย้ง
-- <แปลเป็นไทย> (Wikipedia: <Page Title>)
-- <แปลเป็นไทย> (Wikipedia: <Page Title>)
-- <แปลเป็นไทย> (Wikipedia: <Page Title>)
+RULES (STRICT):
+- ตอบเป็นข้อความล้วน บรรทัดละหนึ่งข้อ ขึ้นต้นด้วยหมายเลขเดิม เช่น "1. ..."
+- จำนวนบรรทัดต้องเท่ากับต้นฉบับ ห้ามรวม ห้ามข้าม ห้ามเพิ่มคำอธิบาย
+- คงชื่อเฉพาะ (คน สถานที่ องค์กร) ตามต้นฉบับได้
 
-4) ตรวจสมดุล:
-- pos_count = <ตัวเลขจริงจากจำนวนข้อใน POS_DATA>
-- neg_count = <ตัวเลขจริงจากจำนวนข้อใน NEG_DATA>
-- สรุปว่า: <สมดุล/ไม่สมดุล>
+LINES:
+{ verdict_source? }
+""",
+    output_key="verdict_translations",
+    include_contents="none",
+    generate_content_config=types.GenerateContentConfig(temperature=0),
+    before_model_callback=[cached_model_response, log_query_to_model],
+    after_model_callback=[log_model_response, store_model_response],
+    before_agent_callback=start_agent_span,
+    after_agent_callback=end_agent_span,
+)
 
-5) กติกาตัดสิน:
-5) กติกาตัดสิน:
-- ถ้า pos_count > neg_count => "ถูกมากกว่าผิด"
-- ถ้า neg_count > pos_count => "ผิดมากกว่าถูก"
-- ถ้า pos_count == neg_count => "สูสี"
-6) ข้อสรุปสุดท้าย: <ถูกมากกว่าผิด/ผิดมากกว่าถูก/สูสี> เพราะ <เช่น 3 ต่อ 2>
 
-FILE SAVE (MANDATORY):
-- หลังจากพิมพ์รายงานครบทั้ง 1-6 ให้เรียก write_file
-- โดยให้ content = ข้อความรายงานทั้งหมด (ทั้ง 1-6) แบบตรงตัว
+class VerdictWriter(BaseAgent):
+    """Renders the verdict in code; the model only translates the fact lines.
 
-Call:
-write_file(directory="outputs", filename="{topic}.txt", content="<FULL REPORT TEXT>")
+    Sections 1-6 (counts, balance, outcome) are computed from the evidence
+    store. Fact sentences already in ``translation_cache`` are reused;
+    only the misses go to ``fact_translator`` as one numbered batch (no
+    model call at all when every line is cached). The report is written
+    straight to OUTPUT_DIR.
+    """
 
-""",
-    tools=[write_file],
-    generate_content_config=types.GenerateContentConfig(temperature=0),
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        lines = verdict_lines(state)
+        keys = [translation_key(line) for line in lines]
+        translations = [translation_cache.get(key) or "" for key in keys]
+        misses = [i for i, t in enumerate(translations) if not t]
+
+        # ส่งให้โมเดลเฉพาะบรรทัดที่ยังไม่เคยแปล (ครบทุกบรรทัดแล้ว -> ไม่เรียกโมเดลเลย)
+        if misses:
+            yield Event(
+                author=self.name,
+                invocation_id=ctx.invocation_id,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={
+                    "verdict_source": "\n".join(f"{n}. {lines[i]}" for n, i in enumerate(misses, 1)),
+                    "verdict_translations": "",
+                }),
+            )
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
+            translated = parse_translations(ctx.session.state.get("verdict_translations", ""), len(misses))
+            for i, text in zip(misses, translated):
+                if text:
+                    translations[i] = text
+                    translation_cache.set(keys[i], text)
+
+        logging.info(
+            f"[Verdict] translations cached={len(lines) - len(misses)} sent={len(misses)} "
+            f"cache={translation_cache.stats()}"
+        )
+        report = render_verdict(ctx.session.state, translations)
+        path = _save_text(OUTPUT_DIR, verdict_filename(ctx.session.state.get("topic", "")), report)
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=f"Verdict saved to {path}")]),
+            actions=EventActions(state_delta={"output_path": path}),
+        )
+
+
+verdict_writer = VerdictWriter(
+    name="verdict_writer",
+    description="Writes neutral Thai verdict and saves to outputs/<topic>.txt",
+    sub_agents=[fact_translator],
+    before_agent_callback=[skip_completed_stage, start_agent_span],
+    after_agent_callback=[end_agent_span, save_checkpoint],
 )
 
 # ----------------------------
@@ -449,6 +990,8 @@ court_system = SequentialAgent(
     name="court_system",
     description="Historical Court: loop investigation/review then write verdict.",
     sub_agents=[trial_loop, verdict_writer],
+    before_agent_callback=[restore_checkpoint, start_agent_span],
+    after_agent_callback=[end_agent_span, clear_checkpoint],
 )
 
 # ----------------------------
@@ -456,7 +999,7 @@ court_system = SequentialAgent(
 # ----------------------------
 root_agent = Agent(
     name="historical_court_root",
-    model=Gemini(model=model_name, retry_options=RETRY_OPTIONS),
+    model=get_model(model_name),
     description="Starts Historical Court: init state -> run court_system.",
     instruction="""
 RULE:
@@ -471,4 +1014,10 @@ FLOW:
     tools=[init_topic],
     sub_agents=[court_system],
     generate_content_config=types.GenerateContentConfig(temperature=0),
+    before_model_callback=[cached_model_response, log_query_to_model],
+    after_model_callback=[log_model_response, store_model_response],
+    before_tool_callback=start_tool_span,
+    after_tool_callback=end_tool_span,
+    before_agent_callback=start_agent_span,
+    after_agent_callback=end_agent_span,
 )
@@ -0,0 +1,207 @@
+"""Batch runner: many Historical Court topics with bounded concurrency.
+
+Each topic runs ``court_system`` in its own session (isolated state seeded by
+``initial_state``); all sessions share this process, so the Wikipedia disk
+cache, page index and HTTP pool are shared too. Every attempt result is
+appended to a JSONL manifest, and topics already marked ``ok`` there are
+skipped on the next run, so an interrupted batch can simply be restarted.
+Each topic also has a stable run id, so a topic that died mid-run (in a
+retry or after a restart) resumes from its last stage checkpoint instead of
+repeating the searches and model calls of the stages that had finished.
+
+CLI:
+
+    python -m workflow_agents.batch topics.txt --concurrency 4
+    python -m workflow_agents.batch --topic "Richard Nixon" --topic "Winston Churchill"
+
+Python:
+
+    from workflow_agents.batch import run_batch
+    records = asyncio.run(run_batch(["Richard Nixon"], concurrency=2))
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from .agent import court_system, initial_state, topic_hash
+from .checkpoint import delete_checkpoint
+from .evidence import evidence_counts
+from callback_logging import export_metrics
+
+
+APP_NAME = "historical_court_batch"
+USER_ID = "batch"
+DEFAULT_MANIFEST = os.path.join("outputs", "batch_manifest.jsonl")
+
+
+def read_topics(path: str) -> list[str]:
+    """One topic per line; blank lines and # comments are ignored."""
+    with open(path, encoding="utf-8") as f:
+        return [ln.strip() for ln in f if ln.strip() and not ln.lstrip().startswith("#")]
+
+
+def load_manifest(path: str) -> dict[str, dict[str, Any]]:
+    """Latest manifest record per topic."""
+    latest: dict[str, dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return latest
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # ไฟล์อาจถูกตัดกลางบรรทัดตอน process ตาย
+            if record.get("topic"):
+                latest[record["topic"]] = record
+    return latest
+
+
+class _Manifest:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = asyncio.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    async def append(self, record: dict[str, Any]) -> None:
+        async with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def topic_slug(topic: str, max_len: int = 40) -> str:
+    """Readable ASCII part of a topic ('' for e.g. a Thai topic); not unique on its own."""
+    return re.sub(r"[^a-zA-Z0-9]+", "-", topic).strip("-").lower()[:max_len]
+
+
+def run_id_for(topic: str) -> str:
+    """Stable checkpoint key of a topic (same across attempts and restarts).
+
+    The slug is only for humans reading the cache; the hash keeps topics
+    that slug the same ("Richard Nixon" / "richard-nixon", Thai topics) apart.
+    """
+    slug = topic_slug(topic)
+    return f"batch-{slug}-{topic_hash(topic)}" if slug else f"batch-{topic_hash(topic)}"
+
+
+async def _run_topic_once(runner: InMemoryRunner, topic: str) -> dict[str, Any]:
+    session_id = f"{topic_slug(topic) or 'topic'}-{uuid.uuid4().hex[:8]}"
+    await runner.session_service.create_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=session_id,
+        state={**initial_state(topic), "run_id": run_id_for(topic)},
+    )
+    message = types.Content(role="user", parts=[types.Part(text=topic)])
+    events = 0
+    async for _ in runner.run_async(user_id=USER_ID, session_id=session_id, new_message=message):
+        events += 1
+
+    session = await runner.session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    state = session.state if session else {}
+    return {
+        "session_id": session_id,
+        "events": events,
+        "output_path": state.get("output_path", ""),
+        **evidence_counts(state),
+    }
+
+
+async def run_batch(
+    topics: Iterable[str],
+    concurrency: int = 4,
+    manifest_path: str = DEFAULT_MANIFEST,
+    attempts: int = 2,
+    resume: bool = True,
+    runner: Optional[InMemoryRunner] = None,
+) -> list[dict[str, Any]]:
+    """Run court_system for every topic; returns the manifest records of this run.
+
+    A topic succeeds when its verdict file was written (state.output_path).
+    Failed or incomplete runs are retried up to ``attempts`` times with a
+    fresh session that resumes from the topic's last stage checkpoint
+    (``resume=False`` also discards those checkpoints).
+    """
+    unique = list(dict.fromkeys(t.strip() for t in topics if t and t.strip()))
+    done = load_manifest(manifest_path) if resume else {}
+    pending = [t for t in unique if done.get(t, {}).get("status") != "ok"]
+    if len(pending) < len(unique):
+        logging.info(f"[batch] resume: skipping {len(unique) - len(pending)} finished topics")
+    if not resume:
+        for topic in pending:
+            delete_checkpoint(run_id_for(topic))
+
+    runner = runner or InMemoryRunner(agent=court_system, app_name=APP_NAME)
+    manifest = _Manifest(manifest_path)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(topic: str) -> dict[str, Any]:
+        async with semaphore:
+            start = time.perf_counter()
+            record: dict[str, Any] = {"topic": topic, "status": "error", "retries": 0, "error": ""}
+            for attempt in range(max(1, attempts)):
+                record["retries"] = attempt
+                try:
+                    result = await _run_topic_once(runner, topic)
+                    record.update(result)
+                    record["status"] = "ok" if result["output_path"] else "incomplete"
+                    record["error"] = ""
+                except Exception as e:
+                    logging.warning(f"[batch] {topic} attempt {attempt + 1} failed: {e}")
+                    record["status"] = "error"
+                    record["error"] = f"{type(e).__name__}: {e}"
+                if record["status"] == "ok":
+                    break
+
+            record["wall_time_s"] = round(time.perf_counter() - start, 3)
+            record["finished_at"] = datetime.now(timezone.utc).isoformat()
+            await manifest.append(record)
+            logging.info(f"[batch] {topic}: {record['status']} in {record['wall_time_s']}s")
+            return record
+
+    return list(await asyncio.gather(*(run_one(t) for t in pending)))
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m workflow_agents.batch")
+    parser.add_argument("topics_file", nargs="?", help="file with one topic per line")
+    parser.add_argument("--topic", action="append", default=[], help="topic to run (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "4")))
+    parser.add_argument("--attempts", type=int, default=2, help="attempts per topic (1 = no retry)")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    parser.add_argument("--no-resume", action="store_true", help="rerun topics already marked ok")
+    parser.add_argument("--metrics-json", help="write a JSON metrics snapshot here at the end")
+    parser.add_argument("--metrics-prom", help="write Prometheus text metrics here at the end")
+    args = parser.parse_args(argv)
+
+    topics = list(args.topic)
+    if args.topics_file:
+        topics += read_topics(args.topics_file)
+    if not topics:
+        parser.error("give a topics file or at least one --topic")
+
+    records = asyncio.run(run_batch(
+        topics,
+        concurrency=args.concurrency,
+        manifest_path=args.manifest,
+        attempts=args.attempts,
+        resume=not args.no_resume,
+    ))
+    export_metrics(args.metrics_json, args.metrics_prom)
+    ok = sum(1 for r in records if r["status"] == "ok")
+    print(f"{ok}/{len(records)} topics ok -> {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Stage checkpoints of the court state, so an interrupted run can resume.
+
+Every court stage saves a snapshot of the durable state keys (topic,
+suffixes, evidence, titles, loop iteration, output path) when it completes
+(``save_checkpoint`` as an after_agent_callback). Snapshots live in a
+``DiskCache`` table keyed by run id: ``state["run_id"]`` when the caller set
+one (the batch runner uses the topic), otherwise the session id.
+
+On the next run with the same run id:
+
+- ``restore_checkpoint`` (before court_system) copies the snapshot back into
+  state, so SideGate / prefetch / judge continue from the saved evidence and
+  loop iteration and the Wikipedia pages come from the disk cache;
+- ``skip_completed_stage`` (before trial_loop / verdict_writer) skips a stage
+  that already completed, by returning content instead of running it;
+- ``clear_checkpoint`` (after court_system) drops the snapshot once the
+  whole run is finished.
+"""
+import logging
+import os
+import time
+from typing import Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .disk_cache import DiskCache
+
+
+CHECKPOINT_KEYS = (
+    "topic",
+    "pos_suffix", "neg_suffix",
+    "required_neg_tags",
+    "pos_evidence", "neg_evidence",
+    "pos_facts", "neg_facts",
+    "pos_titles", "neg_titles",
+    "loop_iteration",
+    "output_path",
+)
+# stage ที่ข้ามได้ทั้งก้อนเมื่อเคยทำเสร็จแล้ว (stage ย่อยใน loop ใช้ evidence ที่กู้คืนมาแทน)
+SKIPPABLE_STAGES = ("trial_loop", "verdict_writer")
+
+checkpoints = DiskCache(
+    path=os.getenv("CHECKPOINT_PATH", os.path.join(os.getenv("CACHE_DIR", ".cache"), "checkpoints.sqlite3")),
+    ttl_seconds=float(os.getenv("CHECKPOINT_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("CHECKPOINT_MAX_ENTRIES", "1000")),
+    table="checkpoints",
+)
+
+
+def run_id_of(callback_context: CallbackContext) -> str:
+    return str(callback_context.state.get("run_id") or callback_context.session.id)
+
+
+def load_checkpoint(run_id: str) -> Optional[dict[str, Any]]:
+    record = checkpoints.get(f"run:{run_id}")
+    return record if isinstance(record, dict) else None
+
+
+def delete_checkpoint(run_id: str) -> None:
+    checkpoints.delete(f"run:{run_id}")
+
+
+def save_checkpoint(callback_context: CallbackContext) -> None:
+    run_id = run_id_of(callback_context)
+    state = callback_context.state
+    record = load_checkpoint(run_id)
+    saved_topic = ((record or {}).get("state") or {}).get("topic")
+    if not record or (saved_topic and saved_topic != state.get("topic")):
+        # record ของ topic อื่น (run id ชนกัน) -> เริ่มใหม่ ห้ามต่อ stage ของเขา
+        record = {"stages": []}
+    stage = callback_context.agent_name
+    if stage not in record["stages"]:
+        record["stages"].append(stage)
+    record.update({
+        "state": {k: state.get(k) for k in CHECKPOINT_KEYS if state.get(k) is not None},
+        "stage": stage,
+        "iteration": int(state.get("loop_iteration") or 0),
+        "updated": time.time(),
+    })
+    checkpoints.set(f"run:{run_id}", record)
+    return None
+
+
+def restore_checkpoint(callback_context: CallbackContext) -> None:
+    run_id = run_id_of(callback_context)
+    record = load_checkpoint(run_id)
+    if not record:
+        return None
+    saved = record.get("state") or {}
+    topic = callback_context.state.get("topic")
+    if topic and saved.get("topic") and saved["topic"] != topic:
+        logging.info(f"[checkpoint] {run_id}: topic changed, ignoring saved state")
+        delete_checkpoint(run_id)
+        return None
+
+    for key, value in saved.items():
+        callback_context.state[key] = value
+    callback_context.state["completed_stages"] = list(record.get("stages") or [])
+    logging.info(f"[checkpoint] {run_id}: resumed after {record.get('stage')} (iteration {record.get('iteration')})")
+    return None
+
+
+def skip_completed_stage(callback_context: CallbackContext) -> Optional[types.Content]:
+    stage = callback_context.agent_name
+    done = callback_context.state.get("completed_stages") or []
+    if stage not in SKIPPABLE_STAGES or stage not in done:
+        return None
+    if stage == "verdict_writer":
+        path = callback_context.state.get("output_path")
+        if not path or not os.path.exists(path):
+            return None  # ไฟล์หาย -> เขียนใหม่ (คำแปลอยู่ใน cache แล้ว)
+    logging.info(f"[checkpoint] {run_id_of(callback_context)}: {stage} already completed, skipped")
+    return types.Content(role="model", parts=[types.Part(text=f"{stage} restored from checkpoint.")])
+
+
+def clear_checkpoint(callback_context: CallbackContext) -> None:
+    delete_checkpoint(run_id_of(callback_context))
+    return None
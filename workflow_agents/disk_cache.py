@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+
+# ----------------------------
+# SQLite key/value cache (TTL + LRU)
+# ----------------------------
+class DiskCache:
+    """Persistent JSON key/value cache stored in a single SQLite file.
+
+    - Entries older than ``ttl_seconds`` are treated as misses and removed.
+    - When the table grows past ``max_entries`` the least recently used
+      rows are evicted.
+    - ``stats()`` exposes hit/miss/eviction counters for this process.
+
+    The connection is opened lazily on first use and shared between threads
+    (guarded by a lock), so one instance can back tools that run in parallel.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int, table: str = "cache"):
+        self.path = path
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self.table = table
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "sets": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            # WAL ให้หลาย process (เช่น batch runner) อ่าน/เขียนไฟล์เดียวกันได้
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table}(accessed)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            value, created = row
+            if self.ttl_seconds > 0 and now - created > self.ttl_seconds:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                conn.commit()
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            conn.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self._stats["hits"] += 1
+
+        try:
+            return json.loads(value)
+        except ValueError:
+            logging.warning(f"[DiskCache] corrupt entry dropped: {key}")
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value and evict LRU rows over the size cap."""
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            self._stats["sets"] += 1
+
+            if self.max_entries > 0:
+                (count,) = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN ("
+                        f" SELECT key FROM {self.table} ORDER BY accessed ASC LIMIT ?)",
+                        (overflow,),
+                    )
+                    self._stats["evictions"] += overflow
+            conn.commit()
+
+    def iter_prefix(self, prefix: str) -> list[tuple[str, Any]]:
+        """All live (key, value) pairs whose key starts with prefix.
+
+        Used to warm in-memory structures from the cache; it does not count
+        as hits and does not refresh LRU order.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                f"SELECT key, value, created FROM {self.table} WHERE key >= ? AND key < ?",
+                (prefix, prefix + "\uffff"),
+            ).fetchall()
+
+        items = []
+        for key, value, created in rows:
+            if self.ttl_seconds > 0 and now - created > self.ttl_seconds:
+                continue
+            try:
+                items.append((key, json.loads(value)))
+            except ValueError:
+                continue
+        return items
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"DELETE FROM {self.table}")
+            conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Counters for this process plus the current on-disk size."""
+        with self._lock:
+            conn = self._connect()
+            (size,) = conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            snapshot: dict[str, Any] = dict(self._stats)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["size"] = size
+        snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 4) if lookups else 0.0
+        return snapshot
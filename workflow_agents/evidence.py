@@ -0,0 +1,178 @@
+"""Typed evidence store for the two sides of the court.
+
+Each side keeps its facts as compact rows in one state key::
+
+    state["pos_evidence"] = {"facts": [[tag, text, title, pageid, revision], ...],
+                             "titles": ["Page A", "Page B"]}
+
+``EvidenceStore`` loads those rows once and keeps a title set, a text set
+(dedup) and a per-tag index, so dedup, tag and balance checks are set/dict
+lookups instead of scans and regex parsing of FACT strings. Every write
+also refreshes two small prompt renderings, ``<side>_facts`` and
+``<side>_titles``. The sides live in separate keys because the Admirer and
+the Critic write in parallel.
+"""
+import re
+from typing import Any, Iterable, NamedTuple, Optional
+
+
+SIDES = ("pos", "neg")
+NEG_TAGS = ("LEGAL", "JAN6", "OTHER")
+MAX_FACTS = 3
+
+# ชื่อหน้า Wikipedia มีวงเล็บได้ เช่น "Trump v. United States (2024)" -> จับถึง ")" ตัวสุดท้ายของบรรทัด
+# tag รับตัวพิมพ์เล็ก / มีช่องว่าง (FACT [jan6]:) แล้วแปลงเป็นตัวพิมพ์ใหญ่ตอน parse
+FACT_LINE_RE = re.compile(
+    r"^\s*FACT\s*(?:\[\s*(?P<tag>[A-Za-z0-9_]+)\s*\])?\s*:\s*(?P<text>.*?)\s*(?:\(Wikipedia:\s*(?P<title>.*)\))?\s*$",
+    re.I,
+)
+# หลาย FACT ในบรรทัดเดียว (โมเดลบางครั้งรวมมาเป็นก้อนเดียว)
+FACT_SPLIT_RE = re.compile(r"(?=FACT\s*(?:\[\s*[A-Za-z0-9_]+\s*\])?\s*:)")
+
+
+def _norm(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+class Fact(NamedTuple):
+    tag: str
+    text: str
+    title: str
+    pageid: str = ""
+    revision: str = ""
+
+    @classmethod
+    def parse(cls, line: str) -> "Fact":
+        """'FACT[TAG]: text (Wikipedia: Title)' -> Fact (tag '' for plain FACT:)."""
+        m = FACT_LINE_RE.match(line or "")
+        if not m:
+            return cls("", _norm(line), "")
+        return cls((m.group("tag") or "").upper(), _norm(m.group("text")), _norm(m.group("title") or ""))
+
+    def line(self) -> str:
+        """Original FACT line form."""
+        prefix = f"FACT[{self.tag}]" if self.tag else "FACT"
+        source = f" (Wikipedia: {self.title})" if self.title else ""
+        return f"{prefix}: {self.text}{source}"
+
+    def row(self) -> list[str]:
+        row = list(self)
+        while len(row) > 3 and not row[-1]:
+            row.pop()
+        return row
+
+
+def split_fact_lines(blob: str) -> list[str]:
+    """Split a tool argument into individual FACT lines."""
+    lines = [_norm(ln) for ln in (blob or "").splitlines() if _norm(ln)]
+    if len(lines) == 1 and len(FACT_SPLIT_RE.findall(lines[0])) >= 2:
+        lines = [p.strip() for p in FACT_SPLIT_RE.split(lines[0]) if p.strip()]
+    return lines
+
+
+class _Side:
+    __slots__ = ("facts", "titles", "texts", "by_tag")
+
+    def __init__(self, data: Any):
+        data = data if isinstance(data, dict) else {}
+        self.facts: list[Fact] = [Fact(*row[:5]) for row in data.get("facts", []) if isinstance(row, list) and len(row) >= 3]
+        self.titles: set[str] = {t for t in data.get("titles", []) if isinstance(t, str)}
+        self.titles.update(f.title for f in self.facts if f.title)
+        self.texts: set[str] = {f.text.lower() for f in self.facts}
+        self.by_tag: dict[str, Fact] = {}
+        for f in self.facts:
+            self.by_tag.setdefault(f.tag, f)
+
+    def dump(self) -> dict[str, list]:
+        return {"facts": [f.row() for f in self.facts], "titles": sorted(self.titles)}
+
+
+class EvidenceStore:
+    """Both sides of the evidence, indexed; read from / written back to session state."""
+
+    def __init__(self, state: Any):
+        self.sides = {side: _Side(state.get(f"{side}_evidence")) for side in SIDES}
+        required = state.get("required_neg_tags") or NEG_TAGS
+        self.required_tags = [t for t in required if isinstance(t, str)]
+
+    @classmethod
+    def from_state(cls, state: Any) -> "EvidenceStore":
+        return cls(state)
+
+    # --- queries ---
+    def facts(self, side: str) -> list[Fact]:
+        return list(self.sides[side].facts)
+
+    def count(self, side: str) -> int:
+        return len(self.sides[side].facts)
+
+    def titles(self, side: Optional[str] = None) -> set[str]:
+        if side:
+            return set(self.sides[side].titles)
+        return set().union(*(s.titles for s in self.sides.values()))
+
+    def missing_tags(self) -> list[str]:
+        by_tag = self.sides["neg"].by_tag
+        return [t for t in self.required_tags if t not in by_tag]
+
+    # --- updates ---
+    def use_title(self, side: str, title: str) -> bool:
+        title = _norm(title)
+        if not title or title in self.sides[side].titles:
+            return False
+        self.sides[side].titles.add(title)
+        return True
+
+    def add(self, side: str, fact: Fact) -> str:
+        """'added' / 'duplicate' / 'full' / 'rejected' (neg tag missing or already present)."""
+        s = self.sides[side]
+        if len(s.facts) >= MAX_FACTS:
+            return "full"
+        if not fact.text or fact.text.lower() in s.texts:
+            return "duplicate"
+        if side == "neg":
+            if fact.tag not in self.required_tags or fact.tag in s.by_tag:
+                return "rejected"
+        else:
+            fact = fact._replace(tag="")
+        s.facts.append(fact)
+        s.texts.add(fact.text.lower())
+        s.by_tag.setdefault(fact.tag, fact)
+        if fact.title:
+            s.titles.add(fact.title)
+        return "added"
+
+    # --- state ---
+    def state_delta(self, side: str) -> dict[str, Any]:
+        """Compact record + prompt renderings of one side."""
+        return {
+            f"{side}_evidence": self.sides[side].dump(),
+            f"{side}_facts": self.render(side),
+            f"{side}_titles": " | ".join(sorted(self.sides[side].titles)) or "(none)",
+        }
+
+    def save(self, state: Any, side: str) -> None:
+        for key, value in self.state_delta(side).items():
+            state[key] = value
+
+    def render(self, side: str) -> str:
+        """One short line per fact for prompts: '[TAG] text (Title)'."""
+        lines = []
+        for f in self.sides[side].facts:
+            tag = f"[{f.tag}] " if f.tag else ""
+            lines.append(f"- {tag}{f.text} ({f.title})" if f.title else f"- {tag}{f.text}")
+        return "\n".join(lines) or "(none)"
+
+
+def empty_evidence(required_tags: Iterable[str] = NEG_TAGS) -> dict[str, Any]:
+    """Initial evidence keys for a fresh topic."""
+    store = EvidenceStore({"required_neg_tags": list(required_tags)})
+    delta: dict[str, Any] = {"required_neg_tags": list(required_tags)}
+    for side in SIDES:
+        delta.update(store.state_delta(side))
+    return delta
+
+
+def evidence_counts(state: Any) -> dict[str, int]:
+    store = EvidenceStore.from_state(state)
+    return {f"{side}_count": store.count(side) for side in SIDES}
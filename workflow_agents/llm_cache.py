@@ -0,0 +1,114 @@
+"""Deterministic LLM response cache for the temperature-0 court agents.
+
+Hooked in as model callbacks:
+
+    before_model_callback=[cached_model_response, log_query_to_model]
+    after_model_callback=[log_model_response, store_model_response]
+
+``LLM_CACHE`` selects the mode:
+
+- ``off`` (default): callbacks do nothing.
+- ``on``: a hit short-circuits the model call, a miss is sent to the model
+  and the response is stored.
+- ``replay``: a hit short-circuits, a miss raises ``LlmCacheMiss``; entries
+  never expire. Use this for reproducible offline runs.
+
+The key is a sha256 over the model name and the canonical JSON of the
+request config (system instruction, tools, generation params) and contents,
+with client-side function call ids removed.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from callback_logging import METRICS
+from .disk_cache import DiskCache
+
+
+LLM_CACHE_MODE = os.getenv("LLM_CACHE", "off").strip().lower()
+if LLM_CACHE_MODE not in ("off", "on", "replay"):
+    raise ValueError(f"LLM_CACHE must be off, on or replay (got {LLM_CACHE_MODE!r})")
+
+# ค่าใน config ที่ไม่มีผลต่อคำตอบของโมเดล (ADK เติม labels ให้เองหลัง callback)
+_IGNORED_CONFIG_FIELDS = {"http_options", "labels"}
+
+llm_cache = DiskCache(
+    path=os.getenv("LLM_CACHE_PATH", os.path.join(os.getenv("CACHE_DIR", ".cache"), "llm_cache.sqlite3")),
+    ttl_seconds=float("inf") if LLM_CACHE_MODE == "replay" else float(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600))),
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000")),
+    table="llm_responses",
+)
+
+# key ของ request ที่กำลังรอคำตอบ แยกตาม (invocation_id, agent_name)
+_pending: dict[tuple[str, str], str] = {}
+_pending_lock = threading.Lock()
+
+
+class LlmCacheMiss(RuntimeError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def _strip_call_ids(value: Any) -> Any:
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            if k in ("function_call", "function_response") and isinstance(v, dict):
+                v = {kk: vv for kk, vv in v.items() if kk != "id"}
+            out[k] = _strip_call_ids(v)
+        return out
+    if isinstance(value, list):
+        return [_strip_call_ids(v) for v in value]
+    return value
+
+
+def request_key(llm_request: LlmRequest, model: str = "") -> str:
+    """Canonical hash of model + config + contents."""
+    config = {}
+    if llm_request.config is not None:
+        config = llm_request.config.model_dump(mode="json", exclude_none=True, exclude=_IGNORED_CONFIG_FIELDS)
+    payload = {
+        "model": llm_request.model or model,
+        "config": config,
+        "contents": [c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents or []],
+    }
+    canonical = json.dumps(_strip_call_ids(payload), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return "llm:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def cached_model_response(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    if LLM_CACHE_MODE == "off":
+        return None
+    agent = callback_context.agent_name
+    key = request_key(llm_request)
+    data = llm_cache.get(key)
+    if data is not None:
+        METRICS.inc("llm_cache_total", agent=agent, result="hit")
+        logging.info(f"[llm_cache hit] {agent} {key[4:16]}")
+        return LlmResponse.model_validate(data)
+
+    METRICS.inc("llm_cache_total", agent=agent, result="miss")
+    if LLM_CACHE_MODE == "replay":
+        raise LlmCacheMiss(f"no recorded response for {agent} (key {key})")
+    with _pending_lock:
+        _pending[(callback_context.invocation_id, agent)] = key
+    return None
+
+
+def store_model_response(callback_context: CallbackContext, llm_response: LlmResponse) -> None:
+    if LLM_CACHE_MODE == "off" or llm_response.partial:
+        return None
+    with _pending_lock:
+        key = _pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if key is None or llm_response.error_code or not llm_response.content:
+        return None
+    data = _strip_call_ids(llm_response.model_dump(mode="json", exclude_none=True))
+    # usage ของการเรียกครั้งแรกไม่ควรถูกนับซ้ำตอน replay
+    data.pop("usage_metadata", None)
+    llm_cache.set(key, data)
+    return None
@@ -0,0 +1,148 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Iterable, Optional
+
+
+# คำที่บอกหมวดของข้อเท็จจริง ใช้ถ่วงน้ำหนักการจัดอันดับหน้า
+TAG_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "POS": (
+        "achievement", "achievements", "legacy", "reform", "reforms", "policy", "economy",
+        "diplomacy", "award", "established", "signed", "founded", "success", "growth", "treaty",
+    ),
+    "LEGAL": (
+        "court", "indictment", "indicted", "lawsuit", "convicted", "conviction", "trial",
+        "ruling", "charges", "impeachment", "impeached", "judge", "prosecutor", "verdict",
+    ),
+    "JAN6": (
+        "january", "capitol", "attack", "election", "overturn", "2020", "certification",
+        "rioters", "insurrection", "electoral",
+    ),
+    "OTHER": (
+        "controversy", "controversies", "criticism", "criticized", "scandal", "dispute",
+        "allegations", "protest", "conflict", "opposition",
+    ),
+}
+TAG_KEYWORDS["NEG"] = TAG_KEYWORDS["LEGAL"] + TAG_KEYWORDS["JAN6"] + TAG_KEYWORDS["OTHER"]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by for from had has have he her his in into is it its "
+    "of on or she that the their them they this to was were which who will with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+def tag_terms(tag: str) -> list[str]:
+    """Keyword terms for a tag such as "LEGAL" or "FACT[JAN6]:" (empty if unknown)."""
+    key = (tag or "").upper().replace("FACT[", "").replace("]", "").rstrip(":").strip()
+    return list(TAG_KEYWORDS.get(key, ()))
+
+
+# ----------------------------
+# BM25 inverted index
+# ----------------------------
+class BM25Index:
+    """In-memory Okapi BM25 index over page content, keyed by page title.
+
+    Documents are added incrementally as pages are fetched (or loaded from
+    the page cache), so ranking never needs extra network requests.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._tf: dict[str, Counter] = {}
+        self._len: dict[str, int] = {}
+        self._postings: dict[str, set[str]] = {}
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._tf
+
+    def __len__(self) -> int:
+        return len(self._tf)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index a document once; re-adding the same id is a no-op."""
+        if doc_id in self._tf:
+            return
+        tokens = tokenize(f"{doc_id} {text}")
+        tf = Counter(tokens)
+        with self._lock:
+            if doc_id in self._tf:
+                return
+            self._tf[doc_id] = tf
+            self._len[doc_id] = len(tokens)
+            self._total_len += len(tokens)
+            for term in tf:
+                self._postings.setdefault(term, set()).add(doc_id)
+
+    def score(self, terms: Iterable[str], doc_id: str) -> float:
+        tf = self._tf.get(doc_id)
+        if not tf:
+            return 0.0
+        n_docs = len(self._tf)
+        avg_len = self._total_len / n_docs if n_docs else 1.0
+        doc_len = self._len[doc_id]
+        total = 0.0
+        for term in set(terms):
+            freq = tf.get(term, 0)
+            if not freq:
+                continue
+            df = len(self._postings.get(term, ()))
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            total += idf * freq * (self.k1 + 1) / (freq + self.k1 * (1 - self.b + self.b * doc_len / avg_len))
+        return total
+
+    def search(self, terms: list[str], limit: int = 10, must_match: Optional[list[str]] = None) -> list[tuple[str, float]]:
+        """Top documents for the terms.
+
+        ``must_match`` restricts results to documents containing at least half
+        of those terms (used to keep pages of the current topic only).
+        """
+        with self._lock:
+            docs = set()
+            for term in set(terms):
+                docs |= self._postings.get(term, set())
+            if must_match:
+                need = max(1, (len(set(must_match)) + 1) // 2)
+                docs = {d for d in docs if sum(1 for t in set(must_match) if t in self._tf[d]) >= need}
+        ranked = sorted(((d, self.score(terms, d)) for d in docs), key=lambda x: -x[1])
+        return ranked[:limit]
+
+
+def rank_candidates(index: BM25Index, query: str, tag: str, titles: list[str],
+                    used: set[str], limit: int = 5) -> list[str]:
+    """Order unused candidate titles by BM25 relevance to query + tag keywords.
+
+    ``titles`` are the remote search hits in their original order. Pages
+    already in the local index (from any earlier fetch) are scored on their
+    content; the remote rank acts as a tie-breaking prior so unindexed hits
+    are still tried. Indexed pages that match the query but were not in the
+    remote hits are added as extra candidates.
+    """
+    query_terms = tokenize(query)
+    terms = query_terms + tag_terms(tag)
+
+    candidates: list[str] = [t for t in titles if t not in used]
+    for doc_id, _ in index.search(terms, limit=limit, must_match=query_terms):
+        if doc_id not in used and doc_id not in candidates:
+            candidates.append(doc_id)
+    if not candidates:
+        return []
+
+    scores = {t: index.score(terms, t) for t in candidates}
+    top = max(scores.values()) or 1.0
+    n = max(len(titles), 1)
+
+    def combined(title: str) -> float:
+        prior = 0.5 * (1 - titles.index(title) / n) if title in titles else 0.0
+        return scores[title] / top + prior
+
+    return sorted(candidates, key=combined, reverse=True)
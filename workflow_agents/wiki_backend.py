@@ -0,0 +1,97 @@
+import logging
+import threading
+from typing import Any, Optional
+
+
+USER_AGENT = "HistoricalCourt/1.0 (Google ADK multi-agent lab)"
+
+
+# ----------------------------
+# Online backend (live Wikipedia API)
+# ----------------------------
+class OnlineWikiBackend:
+    """Title-first access to the live MediaWiki API.
+
+    ``search_titles`` costs one small API request and returns only titles;
+    ``fetch_page`` downloads the content of a single page in one request.
+    Callers resolve candidates first and fetch just the page they actually
+    return, instead of loading every search hit in full.
+
+    All requests go through one pooled ``requests.Session`` so concurrent
+    lookups (see ``wiki_search_many``) reuse keep-alive connections.
+    """
+
+    def __init__(self, lang: str = "en", doc_content_chars_max: int = 4000, pool_size: int = 8, timeout: float = 15):
+        self.lang = lang
+        self.doc_content_chars_max = doc_content_chars_max
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.api_url = f"https://{lang}.wikipedia.org/w/api.php"
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def _http(self):
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                self._session = session
+            return self._session
+
+    def _query(self, params: dict[str, Any]) -> dict[str, Any]:
+        params = {"action": "query", "format": "json", "formatversion": "2", **params}
+        resp = self._http().get(self.api_url, params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        if "error" in data:
+            raise RuntimeError(f"MediaWiki error: {data['error']}")
+        return data.get("query", {})
+
+    def search_titles(self, query: str, limit: int = 5) -> list[str]:
+        """Return up to ``limit`` candidate page titles for a query."""
+        result = self._query({
+            "list": "search",
+            "srsearch": query[:300],
+            "srlimit": limit,
+            "srprop": "",
+        })
+        return [hit["title"] for hit in result.get("search", []) if hit.get("title")]
+
+    def fetch_page(self, title: str) -> Optional[dict[str, Any]]:
+        """Load one page by exact title; None if missing or a disambiguation page."""
+        result = self._query({
+            "prop": "extracts|revisions|info|pageprops",
+            "explaintext": "1",
+            "rvprop": "ids",
+            "inprop": "url",
+            "ppprop": "disambiguation",
+            "redirects": "1",
+            "titles": title,
+        })
+        pages = result.get("pages") or []
+        if not pages:
+            return None
+
+        page = pages[0]
+        if page.get("missing") or page.get("invalid"):
+            logging.info(f"[wiki_backend skip] {title}: missing")
+            return None
+        if "disambiguation" in (page.get("pageprops") or {}):
+            logging.info(f"[wiki_backend skip] {title}: disambiguation")
+            return None
+
+        revisions = page.get("revisions") or [{}]
+        content = (page.get("extract") or "").strip()[: self.doc_content_chars_max]
+        return {
+            "title": page.get("title") or title,
+            "content": content,
+            "pageid": str(page.get("pageid") or ""),
+            "revision": str(revisions[0].get("revid") or ""),
+            "url": page.get("fullurl") or "",
+        }
@@ -0,0 +1,349 @@
+"""Offline Wikipedia backend over a local dump.
+
+Two dump layouts are supported:
+
+- the official ``*-pages-articles-multistream.xml.bz2`` dump, whose companion
+  ``*-multistream-index.txt.bz2`` lists ``offset:page_id:title`` for every page;
+- a pre-extracted JSONL file with one ``{"title", "text", "id", "revision"}``
+  object per line.
+
+``build-index`` turns either one into a compact, sorted binary index
+(title -> byte offset) that is memory-mapped at runtime, so a lookup is a
+binary search over the mapped file and a page read decompresses only the
+single bz2 stream (about 100 pages) that contains it.
+
+Build an index:
+
+    python -m workflow_agents.wiki_offline build-index \\
+        --dump enwiki-latest-pages-articles-multistream.xml.bz2 \\
+        --source-index enwiki-latest-pages-articles-multistream-index.txt.bz2 \\
+        --out enwiki.idx
+
+    python -m workflow_agents.wiki_offline build-index --dump pages.jsonl --out pages.idx
+"""
+import argparse
+import bz2
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from typing import Any, Iterator, Optional
+
+
+MAGIC = b"WKIX0001"
+HEADER = struct.Struct("<8sQQ")      # magic, record count, blob offset
+RECORD = struct.Struct("<QQQQ")      # key offset (in blob), key length, data offset, page id
+
+_NAMESPACE_RE = re.compile(
+    r"^(?:[A-Za-z ]+ talk|Talk|User|Wikipedia|File|Image|MediaWiki|Template|Help|Category|"
+    r"Portal|Draft|Module|TimedText|Book|Education Program|Gadget|Gadget definition):"
+)
+
+
+def normalize_title(title: str) -> str:
+    """Index key: underscores as spaces, collapsed whitespace, casefolded."""
+    return " ".join((title or "").replace("_", " ").split()).casefold()
+
+
+# ----------------------------
+# Index build
+# ----------------------------
+def _iter_multistream_index(path: str) -> Iterator[tuple[str, int, int]]:
+    opener = bz2.open if path.endswith(".bz2") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            offset, page_id, title = line.rstrip("\n").split(":", 2)
+            yield title, int(offset), int(page_id)
+
+
+def _iter_jsonl(path: str) -> Iterator[tuple[str, int, int]]:
+    with open(path, "rb") as f:
+        offset = 0
+        for raw in f:
+            line_offset = offset
+            offset += len(raw)
+            if not raw.strip():
+                continue
+            row = json.loads(raw)
+            page_id = row.get("id") or 0
+            yield row.get("title", ""), line_offset, int(page_id) if str(page_id).isdigit() else 0
+
+
+def build_index(dump_path: str, out_path: str, source_index: Optional[str] = None) -> int:
+    """Write the sorted title index for a dump; returns the number of titles."""
+    if dump_path.endswith(".jsonl"):
+        entries = _iter_jsonl(dump_path)
+    else:
+        if not source_index:
+            raise ValueError("a bz2 multistream dump needs --source-index (the *-multistream-index.txt.bz2 file)")
+        entries = _iter_multistream_index(source_index)
+
+    rows: dict[bytes, tuple[int, int]] = {}
+    for title, offset, page_id in entries:
+        if not title or _NAMESPACE_RE.match(title):
+            continue
+        key = normalize_title(title).encode("utf-8") + b"\0" + title.encode("utf-8")
+        rows.setdefault(key, (offset, page_id))
+
+    keys = sorted(rows, key=lambda k: k.split(b"\0", 1)[0])
+    blob_offset = HEADER.size + RECORD.size * len(keys)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys), blob_offset))
+        key_offset = 0
+        for key in keys:
+            offset, page_id = rows[key]
+            f.write(RECORD.pack(key_offset, len(key), offset, page_id))
+            key_offset += len(key)
+        for key in keys:
+            f.write(key)
+    os.replace(tmp_path, out_path)
+    return len(keys)
+
+
+# ----------------------------
+# Wikitext -> plain text
+# ----------------------------
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+_REF_RE = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S | re.I)
+_TEMPLATE_RE = re.compile(r"\{\{[^{}]*\}\}")
+_TABLE_RE = re.compile(r"\{\|.*?\|\}", re.S)
+_FILE_LINK_RE = re.compile(r"\[\[(?:File|Image|Category):[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]", re.I)
+_LINK_RE = re.compile(r"\[\[(?:[^|\[\]]*\|)?([^\[\]]*)\]\]")
+_EXT_LINK_RE = re.compile(r"\[https?://[^\s\]]+\s?([^\]]*)\]")
+_HEADING_RE = re.compile(r"^=+\s*(.*?)\s*=+\s*$", re.M)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def wikitext_to_text(wikitext: str) -> str:
+    """Rough plain-text rendering of wikitext (enough for fact extraction)."""
+    text = _COMMENT_RE.sub("", wikitext or "")
+    text = _REF_RE.sub("", text)
+    for _ in range(10):  # templates nest; peel from the inside out
+        text, n = _TEMPLATE_RE.subn("", text)
+        if not n:
+            break
+    text = _TABLE_RE.sub("", text)
+    text = _FILE_LINK_RE.sub("", text)
+    text = _LINK_RE.sub(r"\1", text)
+    text = _EXT_LINK_RE.sub(r"\1", text)
+    text = _HEADING_RE.sub(r"\1", text)
+    text = _TAG_RE.sub("", text)
+    text = text.replace("'''", "").replace("''", "")
+    lines = [ln.strip() for ln in text.splitlines()]
+    return "\n".join(ln for ln in lines if ln and not ln.startswith(("|", "!", "*[[", "__")))
+
+
+# ----------------------------
+# Offline backend
+# ----------------------------
+class OfflineWikiBackend:
+    """Same interface as OnlineWikiBackend, served from a local dump + index."""
+
+    def __init__(self, dump_path: str, index_path: str, lang: str = "en",
+                 doc_content_chars_max: int = 4000, stream_cache_size: int = 16):
+        self.dump_path = dump_path
+        self.index_path = index_path
+        self.lang = lang
+        self.doc_content_chars_max = doc_content_chars_max
+        self.stream_cache_size = stream_cache_size
+        self._mm: Optional[mmap.mmap] = None
+        self._count = 0
+        self._blob = 0
+        self._lock = threading.Lock()
+        self._streams: "OrderedDict[int, bytes]" = OrderedDict()
+
+    # --- index access (memory-mapped, binary search) ---
+    def _index(self) -> mmap.mmap:
+        with self._lock:
+            if self._mm is None:
+                with open(self.index_path, "rb") as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, count, blob = HEADER.unpack_from(mm, 0)
+                if magic != MAGIC:
+                    raise ValueError(f"not a wiki index: {self.index_path}")
+                self._mm, self._count, self._blob = mm, count, blob
+            return self._mm
+
+    def _record(self, i: int) -> tuple[bytes, str, int, int]:
+        mm = self._index()
+        key_off, key_len, data_offset, page_id = RECORD.unpack_from(mm, HEADER.size + i * RECORD.size)
+        start = self._blob + key_off
+        key, title = mm[start:start + key_len].split(b"\0", 1)
+        return key, title.decode("utf-8"), data_offset, page_id
+
+    def _lower_bound(self, key: bytes) -> int:
+        self._index()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _lookup(self, title: str) -> Optional[tuple[str, int, int]]:
+        """Record for *title*; among titles sharing the casefolded key ("Nirvana" /
+        "NIRVANA") the exact spelling wins, else the first one."""
+        key = normalize_title(title).encode("utf-8")
+        wanted = " ".join((title or "").replace("_", " ").split())
+        first = None
+        i = self._lower_bound(key)
+        while i < self._count:
+            rec_key, rec_title, data_offset, page_id = self._record(i)
+            if rec_key != key:
+                break
+            if rec_title.replace("_", " ") == wanted:
+                return rec_title, data_offset, page_id
+            first = first or (rec_title, data_offset, page_id)
+            i += 1
+        return first
+
+    def _prefix(self, phrase: str, limit: int) -> list[str]:
+        """Titles that continue *phrase* with more words ("Richard Nixon" -> "Richard Nixon Library")."""
+        # normalize_title ตัด space ท้ายทิ้ง -> ต่อ separator หลัง normalise
+        key = normalize_title(phrase).encode("utf-8") + b" "
+        titles = []
+        i = self._lower_bound(key)
+        while i < self._count and len(titles) < limit:
+            rec_key, rec_title, _, _ = self._record(i)
+            if not rec_key.startswith(key):
+                break
+            titles.append(rec_title)
+            i += 1
+        return titles
+
+    # --- backend interface ---
+    def search_titles(self, query: str, limit: int = 5) -> list[str]:
+        """Title-index search: exact title, then prefix matches, then shorter word prefixes.
+
+        e.g. "Richard Nixon legacy" tries "Richard Nixon legacy", titles starting
+        with it, then "Richard Nixon" (+ titles starting with "Richard Nixon ").
+        """
+        words = " ".join(query.split()).split(" ")
+        titles: list[str] = []
+        for n in range(len(words), 0, -1):
+            phrase = " ".join(words[:n])
+            found = self._lookup(phrase)
+            candidates = ([found[0]] if found else []) + self._prefix(phrase, limit)
+            for title in candidates:
+                if title not in titles:
+                    titles.append(title)
+                if len(titles) >= limit:
+                    return titles
+        return titles
+
+    def fetch_page(self, title: str) -> Optional[dict[str, Any]]:
+        """Read one page by title (following one redirect)."""
+        for _ in range(2):
+            found = self._lookup(title)
+            if found is None:
+                return None
+            real_title, data_offset, page_id = found
+            page = self._read_page(real_title, data_offset)
+            if page is None:
+                return None
+            if page.get("redirect"):
+                title = page["redirect"]
+                continue
+
+            content = page["text"].strip()[: self.doc_content_chars_max]
+            if not content:
+                return None
+            return {
+                "title": real_title,
+                "content": content,
+                "pageid": str(page.get("id") or page_id or ""),
+                "revision": str(page.get("revision") or ""),
+                "url": f"https://{self.lang}.wikipedia.org/wiki/{real_title.replace(' ', '_')}",
+            }
+        return None
+
+    # --- dump access ---
+    def _read_page(self, title: str, data_offset: int) -> Optional[dict[str, Any]]:
+        if self.dump_path.endswith(".jsonl"):
+            with open(self.dump_path, "rb") as f:
+                f.seek(data_offset)
+                row = json.loads(f.readline())
+            return {
+                "text": row.get("text", ""),
+                "id": row.get("id"),
+                "revision": row.get("revision"),
+                "redirect": row.get("redirect"),
+            }
+
+        root = ET.fromstring(b"<stream>" + self._stream(data_offset) + b"</stream>")
+        for page in root.iter("page"):
+            if page.findtext("title") != title:
+                continue
+            redirect = page.find("redirect")
+            return {
+                "text": wikitext_to_text(page.findtext("revision/text") or ""),
+                "id": page.findtext("id"),
+                "revision": page.findtext("revision/id"),
+                "redirect": redirect.get("title") if redirect is not None else None,
+            }
+        logging.warning(f"[wiki_offline] {title} not found in stream @{data_offset}")
+        return None
+
+    def _stream(self, data_offset: int) -> bytes:
+        """Decompress exactly one bz2 stream of the multistream dump (LRU-cached)."""
+        with self._lock:
+            if data_offset in self._streams:
+                self._streams.move_to_end(data_offset)
+                return self._streams[data_offset]
+
+        decompressor = bz2.BZ2Decompressor()
+        chunks = []
+        with open(self.dump_path, "rb") as f:
+            f.seek(data_offset)
+            while not decompressor.eof:
+                block = f.read(256 * 1024)
+                if not block:
+                    break
+                chunks.append(decompressor.decompress(block))
+        data = b"".join(chunks)
+
+        with self._lock:
+            self._streams[data_offset] = data
+            while len(self._streams) > self.stream_cache_size:
+                self._streams.popitem(last=False)
+        return data
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m workflow_agents.wiki_offline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build-index", help="build the memory-mapped title index for a dump")
+    build.add_argument("--dump", required=True, help="multistream .xml.bz2 dump or pre-extracted .jsonl")
+    build.add_argument("--source-index", help="*-multistream-index.txt(.bz2) for bz2 dumps")
+    build.add_argument("--out", help="output index path (default: <dump>.idx)")
+
+    lookup = sub.add_parser("lookup", help="print the titles an offline search would return")
+    lookup.add_argument("--dump", required=True)
+    lookup.add_argument("--index", help="index path (default: <dump>.idx)")
+    lookup.add_argument("query")
+
+    args = parser.parse_args(argv)
+    if args.command == "build-index":
+        out = args.out or args.dump + ".idx"
+        count = build_index(args.dump, out, source_index=args.source_index)
+        print(f"indexed {count} titles -> {out}")
+    else:
+        backend = OfflineWikiBackend(args.dump, args.index or args.dump + ".idx")
+        for title in backend.search_titles(args.query):
+            print(title)
+
+
+if __name__ == "__main__":
+    main()